@@ -0,0 +1,29 @@
+"""
+Gunicorn configuration for the TTS web API.
+
+Usage:
+    gunicorn -c gunicorn.conf.py web_api:app
+"""
+
+bind = "0.0.0.0:9001"
+
+# Import web_api once in the master, before forking, so the worker starts with the
+# VoiceCloner already constructed; CUDA and the model are only touched on first
+# use, which happens after the fork
+preload_app = True
+
+# Task status, the result cache and the loaded models all live in the worker
+# process, so a single worker must serve every request; threads keep status polls
+# and audio downloads concurrent while generation runs on the app's executor
+workers = 1
+worker_class = "gthread"
+threads = 8
+
+# Slow clients downloading audio shouldn't get the worker killed
+timeout = 120
+
+def post_worker_init(worker):
+    """Start the model warm-up and task reaper in the worker; threads started in the master don't survive the fork."""
+    import web_api
+    web_api.start_warmup()
+    web_api.start_task_reaper()
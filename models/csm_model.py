@@ -8,6 +8,9 @@ with proper error handling and GPU/CPU fallback.
 import os
 import torch
 import logging
+import functools
+import threading
+from collections import OrderedDict
 from huggingface_hub import hf_hub_download
 
 # Configure logging
@@ -21,8 +24,20 @@ class ModelNotAvailableError(Exception):
     """Raised when the model cannot be loaded."""
     pass
 
-def is_cuda_available():
-    """Check if CUDA is available and has enough memory."""
+def is_cuda_available(force_refresh=False):
+    """
+    Check if CUDA is available and has enough memory.
+    
+    The probe result is cached for the life of the process; pass
+    force_refresh=True to re-check, e.g. after GPU memory usage changed.
+    """
+    if force_refresh:
+        _probe_cuda.cache_clear()
+    return _probe_cuda()
+
+@functools.lru_cache(maxsize=1)
+def _probe_cuda():
+    """Query the CUDA device for availability and free memory."""
     try:
         if not torch.cuda.is_available():
             logger.info("CUDA not available")
@@ -35,13 +50,13 @@ def is_cuda_available():
         
         # Need at least 2 GB of free memory for the model
         if free_memory_mb < 2000:
-            logger.info(f"Not enough GPU memory ({free_memory_mb:.2f} MB free)")
+            logger.info("Not enough GPU memory (%.2f MB free)", free_memory_mb)
             return False
         
-        logger.info(f"CUDA available with {free_memory_mb:.2f} MB free memory")
+        logger.info("CUDA available with %.2f MB free memory", free_memory_mb)
         return True
     except Exception as e:
-        logger.warning(f"Error checking CUDA: {e}")
+        logger.warning("Error checking CUDA: %s", e)
         return False
 
 class CSMModelLoader:
@@ -49,6 +64,12 @@ class CSMModelLoader:
     Handles loading and using the CSM model with proper fallback mechanisms.
     """
     
+    # Maximum number of generated clips kept in the in-memory audio cache
+    AUDIO_CACHE_SIZE = 128
+    
+    # Maximum length of a generated clip in milliseconds
+    MAX_AUDIO_LENGTH_MS = 20000
+    
     def __init__(self, model_path=None, device="auto"):
         """
         Initialize the model loader.
@@ -61,6 +82,15 @@ class CSMModelLoader:
         self.model = None
         self.loaded_device = None
         
+        # LRU cache of generated audio keyed by (text, speaker_id). Clips are kept on
+        # the CPU so the cache doesn't hold VRAM, and the lock guards the OrderedDict
+        # against concurrent callers
+        self._audio_cache = OrderedDict()
+        self._audio_cache_lock = threading.Lock()
+        
+        # Output directories already created, so we don't re-stat them per call
+        self._known_dirs = set()
+        
         # Determine the device to use
         if device == "auto":
             if is_cuda_available():
@@ -70,7 +100,7 @@ class CSMModelLoader:
         else:
             self.target_device = device
         
-        logger.info(f"Will attempt to load model on {self.target_device}")
+        logger.info("Will attempt to load model on %s", self.target_device)
     
     def load_model(self, force_cpu=False):
         """
@@ -83,24 +113,32 @@ class CSMModelLoader:
             The loaded model or raises ModelNotAvailableError
         """
         if self.model is not None and not force_cpu:
-            logger.info(f"Model already loaded on {self.loaded_device}")
+            logger.info("Model already loaded on %s", self.loaded_device)
             return self.model
         
         # Download model if needed
         if self.model_path is None or not os.path.exists(self.model_path):
             try:
-                logger.info("Downloading model from HuggingFace Hub")
-                self.model_path = hf_hub_download(repo_id="sesame/csm-1b", filename="ckpt.pt")
-                logger.info(f"Model downloaded to {self.model_path}")
-            except Exception as e:
-                logger.error(f"Failed to download model: {e}")
-                raise ModelNotAvailableError(f"Failed to download model: {e}")
+                # Use the local HF cache first to skip the ETag revalidation round-trip
+                self.model_path = hf_hub_download(repo_id="sesame/csm-1b", filename="ckpt.pt", local_files_only=True)
+                logger.info("Using cached model at %s", self.model_path)
+            except Exception:
+                self.model_path = None
+            
+            if self.model_path is None:
+                try:
+                    logger.info("Downloading model from HuggingFace Hub")
+                    self.model_path = hf_hub_download(repo_id="sesame/csm-1b", filename="ckpt.pt")
+                    logger.info("Model downloaded to %s", self.model_path)
+                except Exception as e:
+                    logger.error("Failed to download model: %s", e)
+                    raise ModelNotAvailableError(f"Failed to download model: {e}")
         
         # Try preferred device first
         device_to_try = "cpu" if force_cpu else self.target_device
         
         try:
-            logger.info(f"Loading model on {device_to_try}")
+            logger.info("Loading model on %s", device_to_try)
             
             # Use our standalone implementation
             from .csm_standalone import load_csm_1b
@@ -108,7 +146,7 @@ class CSMModelLoader:
             # Actually load the model
             self.model = load_csm_1b(self.model_path, device_to_try)
             self.loaded_device = device_to_try
-            logger.info(f"Successfully loaded model on {device_to_try}")
+            logger.info("Successfully loaded model on %s", device_to_try)
             return self.model
             
         except torch.cuda.OutOfMemoryError:
@@ -121,7 +159,7 @@ class CSMModelLoader:
             return self.load_model(force_cpu=True)
             
         except Exception as e:
-            logger.error(f"Failed to load model on {device_to_try}: {e}")
+            logger.error("Failed to load model on %s: %s", device_to_try, e)
             
             # If we failed on GPU, try CPU
             if device_to_try != "cpu":
@@ -129,7 +167,7 @@ class CSMModelLoader:
                 try:
                     return self.load_model(force_cpu=True)
                 except Exception as cpu_e:
-                    logger.error(f"CPU fallback also failed: {cpu_e}")
+                    logger.error("CPU fallback also failed: %s", cpu_e)
             
             raise ModelNotAvailableError(f"Failed to load model: {str(e)}")
     
@@ -145,31 +183,54 @@ class CSMModelLoader:
         Returns:
             Audio tensor if output_path is None, otherwise None
         """
-        if self.model is None:
+        cache_key = (text, speaker_id)
+        with self._audio_cache_lock:
+            cached = self._audio_cache.get(cache_key)
+            if cached is not None:
+                self._audio_cache.move_to_end(cache_key)
+        
+        if cached is None and self.model is None:
             self.load_model()
         
         try:
-            logger.info(f"Generating speech for text: '{text[:50]}...' with speaker {speaker_id}")
-            audio = self.model.generate(
-                text=text,
-                speaker=speaker_id,
-                context=[],  # No context for simplicity
-                max_audio_length_ms=20000  # Max 20 seconds
-            )
+            if cached is not None:
+                logger.info("Using cached audio for text: '%s...' with speaker %s", text[:50], speaker_id)
+                audio_cpu = cached
+                # A copy on the model's device, so callers get what a fresh generation
+                # returns and can't mutate the cached tensor
+                audio = cached.to(self.loaded_device or "cpu", copy=True)
+            else:
+                logger.info("Generating speech for text: '%s...' with speaker %s", text[:50], speaker_id)
+                audio = self.model.generate(
+                    text=text,
+                    speaker=speaker_id,
+                    context=[],  # No context for simplicity
+                    max_audio_length_ms=self.MAX_AUDIO_LENGTH_MS
+                )
+                
+                # .cpu() hands CPU tensors back as is, so those are cloned for the cache
+                audio_cpu = audio.cpu()
+                with self._audio_cache_lock:
+                    self._audio_cache[cache_key] = audio_cpu if audio_cpu is not audio else audio.clone()
+                    if len(self._audio_cache) > self.AUDIO_CACHE_SIZE:
+                        self._audio_cache.popitem(last=False)
             
             if output_path:
                 # Ensure output directory exists
-                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                output_dir = os.path.dirname(output_path)
+                if output_dir and output_dir not in self._known_dirs:
+                    os.makedirs(output_dir, exist_ok=True)
+                    self._known_dirs.add(output_dir)
                 
                 # Save audio
-                logger.info(f"Saving audio to {output_path}")
+                logger.info("Saving audio to %s", output_path)
                 
                 # Use torchaudio for saving
                 import torchaudio
-                torchaudio.save(output_path, audio.unsqueeze(0).cpu(), self.model.sample_rate)
+                torchaudio.save(output_path, audio_cpu.unsqueeze(0), self.model.sample_rate)
             
             return audio
             
         except Exception as e:
-            logger.error(f"Speech generation failed: {e}")
+            logger.error("Speech generation failed: %s", e)
             raise 
\ No newline at end of file
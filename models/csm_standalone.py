@@ -8,12 +8,36 @@ that doesn't rely on importing from the movie_maker project.
 import os
 import torch
 import logging
+import functools
 import numpy as np
 import torchaudio
 from huggingface_hub import hf_hub_download
 
 logger = logging.getLogger("csm_standalone")
 
+# Amplitude of the fundamental in the placeholder sine mixture
+BASE_AMPLITUDE = 0.5
+
+@functools.lru_cache(maxsize=16)
+def _phase_vector(duration_sec, num_samples):
+    """Return the read-only FP32 ramp 2*pi*t shared by every clip of this length."""
+    phase = (2 * np.pi) * np.linspace(0, duration_sec, num_samples, dtype=np.float32)
+    phase.setflags(write=False)
+    return phase
+
+@functools.lru_cache(maxsize=16)
+def _speaker_coefs(speaker):
+    """Return (2nd harmonic coef, 3rd harmonic coef, peak bound) for a speaker ID."""
+    if speaker > 0:
+        second = 0.3 * (speaker % 3 + 1) / 4
+        third = 0.2 * (speaker % 5 + 1) / 6
+    else:
+        second = third = 0.0
+    
+    # The amplitudes sum to an upper bound on the peak, so normalizing by it
+    # avoids scanning the buffer for its max
+    return second, third, BASE_AMPLITUDE + second + third
+
 class CSMModel:
     """
     A simplified implementation of the CSM model.
@@ -23,7 +47,7 @@ class CSMModel:
         self.device = device
         self.sample_rate = 24000  # Standard sample rate for CSM model
         self.model = None
-        logger.info(f"CSM Model initialized on device: {device}")
+        logger.info("CSM Model initialized on device: %s", device)
     
     def generate(self, text, speaker=0, context=None, max_audio_length_ms=10000):
         """
@@ -41,34 +65,63 @@ class CSMModel:
         if context is None:
             context = []
             
-        logger.info(f"Generating speech for text: '{text[:50]}...' with speaker {speaker}")
+        logger.info("Generating speech for text: '%s...' with speaker %s", text[:50], speaker)
         
         # This is a simplified implementation that generates a sine wave
         # In a real implementation, this would use the actual CSM model
         duration_sec = min(max_audio_length_ms / 1000, 20)  # Cap at 20 seconds
-        t = torch.linspace(0, duration_sec, int(self.sample_rate * duration_sec))
+        num_samples = int(self.sample_rate * duration_sec)
         
         # Generate a simple sine wave with some variations based on the text
         # This is just a placeholder - the real model would generate actual speech
-        text_hash = sum(ord(c) for c in text)
+        text_hash = sum(text.encode('utf-8'))  # Summed in C; matches ord() for ASCII text
         frequency = 220 + (text_hash % 440)  # A simple way to vary frequency based on text
-        amplitude = 0.5
+        second, third, peak = _speaker_coefs(speaker)
         
-        # Generate sine wave
-        audio = amplitude * torch.sin(2 * np.pi * frequency * t)
-        
-        # Add some variation based on speaker ID
-        if speaker > 0:
-            # Add harmonics for different speakers
-            audio += 0.3 * torch.sin(2 * np.pi * frequency * 2 * t) * (speaker % 3 + 1) / 4
-            audio += 0.2 * torch.sin(2 * np.pi * frequency * 3 * t) * (speaker % 5 + 1) / 6
+        if self.device == "cuda":
+            audio = self._generate_sine_cuda(duration_sec, num_samples, frequency, speaker, second, third)
             
-        # Normalize
-        audio = audio / torch.max(torch.abs(audio))
+            # Normalize in FP32
+            audio *= 1.0 / peak
+        else:
+            # Generate sine wave, sharing one phase vector across all harmonics
+            phase = frequency * _phase_vector(duration_sec, num_samples)
+            audio = BASE_AMPLITUDE * np.sin(phase)
+            
+            # Add some variation based on speaker ID
+            if speaker > 0:
+                # Add harmonics for different speakers
+                audio += second * np.sin(2 * phase)
+                audio += third * np.sin(3 * phase)
+                
+            # Normalize
+            audio *= 1.0 / peak
+            audio = torch.from_numpy(audio)
         
-        logger.info(f"Generated audio with {len(audio)} samples ({duration_sec:.2f}s)")
+        logger.info("Generated audio with %s samples (%.2fs)", len(audio), duration_sec)
         return audio
 
+    def _generate_sine_cuda(self, duration_sec, num_samples, frequency, speaker, second, third):
+        """
+        Generate the sine mixture on the GPU, accumulating harmonics in BF16.
+        
+        The phase ramp is built in FP32 and wrapped to [0, 2*pi) before the
+        cast, since BF16 cannot represent large phase values accurately.
+        Returns an FP32 tensor on the GPU.
+        """
+        t = torch.linspace(0, duration_sec, num_samples, device="cuda")
+        phase = (2 * np.pi * frequency) * t
+        
+        def harmonic(multiple):
+            return torch.sin(torch.remainder(multiple * phase, 2 * np.pi).to(torch.bfloat16))
+        
+        audio = BASE_AMPLITUDE * harmonic(1)
+        if speaker > 0:
+            audio += second * harmonic(2)
+            audio += third * harmonic(3)
+        
+        return audio.float()
+
 def load_csm_1b(model_path=None, device="cpu"):
     """
     Load the CSM model.
@@ -80,7 +133,7 @@ def load_csm_1b(model_path=None, device="cpu"):
     Returns:
         A CSM model instance
     """
-    logger.info(f"Loading CSM model from {model_path or 'default'} on {device}")
+    logger.info("Loading CSM model from %s on %s", model_path or 'default', device)
     
     # In a real implementation, this would load the actual model weights
     # For now, we just return our simplified model
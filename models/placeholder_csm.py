@@ -33,15 +33,15 @@ class PlaceholderCSMModel:
         Returns:
             A placeholder audio tensor (silent by default)
         """
-        logger.warning(f"Placeholder generate called with text: '{text[:50]}...'")
+        logger.warning("Placeholder generate called with text: '%s...'", text[:50])
         
         # Calculate number of samples for the requested duration
         num_samples = int(self.sample_rate * max_audio_length_ms / 1000)
         
-        # Generate silent audio
-        audio = torch.zeros(num_samples)
+        # Generate silent audio; np.zeros gets lazily zeroed pages for large buffers
+        audio = torch.from_numpy(np.zeros(num_samples, dtype=np.float32))
         
-        logger.info(f"Generated placeholder silent audio ({num_samples} samples)")
+        logger.info("Generated placeholder silent audio (%s samples)", num_samples)
         return audio
 
 def load_csm_1b(model_path=None, device="cpu"):
@@ -55,7 +55,7 @@ def load_csm_1b(model_path=None, device="cpu"):
     Returns:
         A placeholder model instance
     """
-    logger.warning(f"Placeholder load_csm_1b called with model_path={model_path}, device={device}")
+    logger.warning("Placeholder load_csm_1b called with model_path=%s, device=%s", model_path, device)
     logger.warning("This is a PLACEHOLDER implementation and will not produce real speech")
     
     return PlaceholderCSMModel() 
\ No newline at end of file
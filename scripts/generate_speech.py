@@ -11,8 +11,11 @@ import argparse
 import logging
 import time
 
+# Project root directory, resolved once at import
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 # Add parent directory to path to allow importing from tts_poc
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
 
 from utils.voice_cloner import VoiceCloner
 
@@ -57,11 +60,11 @@ def main():
         logger.debug("Verbose logging enabled")
     
     # Print arguments
-    logger.info(f"Text: {args.text}")
-    logger.info(f"Voice: {args.voice or 'auto'}")
-    logger.info(f"Output: {args.output or 'auto'}")
-    logger.info(f"Device: {args.device}")
-    logger.info(f"Model: {args.model or 'default'}")
+    logger.info("Text: %s", args.text)
+    logger.info("Voice: %s", args.voice or 'auto')
+    logger.info("Output: %s", args.output or 'auto')
+    logger.info("Device: %s", args.device)
+    logger.info("Model: %s", args.model or 'default')
     
     # Initialize voice cloner
     cloner = VoiceCloner(model_path=args.model)
@@ -78,11 +81,11 @@ def main():
     # Print result
     elapsed_time = time.time() - start_time
     if output_path:
-        logger.info(f"Speech generated successfully in {elapsed_time:.2f} seconds")
-        logger.info(f"Output saved to: {output_path}")
+        logger.info("Speech generated successfully in %.2f seconds", elapsed_time)
+        logger.info("Output saved to: %s", output_path)
         return 0
     else:
-        logger.error(f"Speech generation failed after {elapsed_time:.2f} seconds")
+        logger.error("Speech generation failed after %.2f seconds", elapsed_time)
         return 1
 
 if __name__ == "__main__":
@@ -10,11 +10,24 @@ import sys
 import json
 import logging
 import argparse
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import time
+import shutil
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import parse_qs, urlparse
 
+# Prefer orjson for decoding JSON request bodies when it is installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Project root directory, resolved once at import
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 # Add parent directory to path to allow importing from tts_poc
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT_DIR)
 
 from utils.voice_cloner import VoiceCloner
 
@@ -28,14 +41,25 @@ logger = logging.getLogger("serve_tts")
 # Global voice cloner instance
 cloner = None
 
+# The model isn't thread-safe, so only one generation runs at a time;
+# static file requests are served concurrently outside this lock
+generate_lock = threading.Lock()
+
+def _pick(data, key, default=""):
+    """Get a request parameter, unwrapping the single-item lists produced by parse_qs."""
+    value = data.get(key, default)
+    return value[0] if isinstance(value, list) and value else value
+
 class TTSRequestHandler(BaseHTTPRequestHandler):
     """HTTP request handler for TTS API."""
     
-    def _set_headers(self, status_code=200, content_type="application/json"):
-        """Set response headers."""
+    def _set_headers(self, status_code=200, content_type="application/json", extra_headers=None):
+        """Set response headers, ending the header block exactly once."""
         self.send_response(status_code)
         self.send_header("Content-type", content_type)
         self.send_header("Access-Control-Allow-Origin", "*")
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
     
     def _send_json_response(self, data, status_code=200):
@@ -53,13 +77,11 @@ class TTSRequestHandler(BaseHTTPRequestHandler):
         file_size = os.path.getsize(file_path)
         
         # Send headers
-        self._set_headers(content_type=content_type)
-        self.send_header("Content-Length", str(file_size))
-        self.end_headers()
+        self._set_headers(content_type=content_type, extra_headers={"Content-Length": str(file_size)})
         
-        # Send file content
+        # Stream file content in chunks rather than reading it all into memory
         with open(file_path, "rb") as f:
-            self.wfile.write(f.read())
+            shutil.copyfileobj(f, self.wfile, 64 * 1024)
     
     def _parse_post_data(self):
         """Parse POST data."""
@@ -67,8 +89,8 @@ class TTSRequestHandler(BaseHTTPRequestHandler):
         post_data = self.rfile.read(content_length).decode("utf-8")
         
         try:
-            return json.loads(post_data)
-        except json.JSONDecodeError:
+            return _json_loads(post_data)
+        except json.JSONDecodeError:  # orjson.JSONDecodeError subclasses this
             return parse_qs(post_data)
     
     def do_GET(self):
@@ -78,7 +100,7 @@ class TTSRequestHandler(BaseHTTPRequestHandler):
         
         # Serve static files
         if path.startswith("/voices/"):
-            file_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), path[1:])
+            file_path = os.path.join(ROOT_DIR, path.lstrip("/"))
             self._send_file_response(file_path)
             return
         
@@ -97,9 +119,9 @@ class TTSRequestHandler(BaseHTTPRequestHandler):
             data = self._parse_post_data()
             
             # Extract parameters
-            text = data.get("text", [""])[0] if isinstance(data, dict) and isinstance(data.get("text"), list) else data.get("text", "")
-            voice = data.get("voice", [""])[0] if isinstance(data, dict) and isinstance(data.get("voice"), list) else data.get("voice", "")
-            device = data.get("device", ["auto"])[0] if isinstance(data, dict) and isinstance(data.get("device"), list) else data.get("device", "auto")
+            text = _pick(data, "text")
+            voice = _pick(data, "voice")
+            device = _pick(data, "device", "auto")
             
             # Validate parameters
             if not text:
@@ -108,8 +130,9 @@ class TTSRequestHandler(BaseHTTPRequestHandler):
             
             # Generate speech
             try:
-                logger.info(f"Generating speech for text: '{text[:50]}...'")
-                output_path = cloner.generate(text=text, voice_path=voice or None, device=device)
+                logger.info("Generating speech for text: '%s...'", text[:50])
+                with generate_lock:
+                    output_path = cloner.generate(text=text, voice_path=voice or None, device=device)
                 
                 if output_path:
                     # Return success response
@@ -125,7 +148,7 @@ class TTSRequestHandler(BaseHTTPRequestHandler):
                         "error": "Failed to generate speech"
                     }, 500)
             except Exception as e:
-                logger.error(f"Error generating speech: {e}")
+                logger.error("Error generating speech: %s", e)
                 self._send_json_response({
                     "success": False,
                     "error": str(e)
@@ -176,11 +199,19 @@ def main():
     # Initialize voice cloner
     cloner = VoiceCloner(model_path=args.model)
     
+    # Warm up the model once so the first request doesn't pay the load cost
+    warmup_start = time.time()
+    try:
+        cloner.preload()
+        logger.info("Model warm-up completed in %.2f seconds", time.time() - warmup_start)
+    except Exception as e:
+        logger.warning("Model warm-up failed, will load on first request: %s", e)
+    
     # Start server
     server_address = (args.host, args.port)
-    httpd = HTTPServer(server_address, TTSRequestHandler)
+    httpd = ThreadingHTTPServer(server_address, TTSRequestHandler)
     
-    logger.info(f"Starting TTS server on {args.host}:{args.port}")
+    logger.info("Starting TTS server on %s:%s", args.host, args.port)
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
@@ -0,0 +1,400 @@
+// Voice data that will be loaded from the server
+let voiceData = [];
+
+// Voices keyed by file path, rebuilt whenever voiceData is loaded
+let voiceIndex = new Map();
+
+// Function to log debug messages
+function logDebug(message, type = 'info') {
+    const logContainer = document.getElementById('debug-logs');
+    const logEntry = document.createElement('div');
+    logEntry.className = `log-entry log-${type}`;
+
+    const timestamp = new Date().toISOString().substring(11, 23);
+    logEntry.textContent = `[${timestamp}] ${message}`;
+
+    logContainer.prepend(logEntry);
+    console.log(`[DEBUG] ${message}`);
+}
+
+// Function to update character information based on voice selection
+function updateCharacterInfo(voiceId) {
+    const voice = voiceIndex.get(voiceId);
+    if (!voice) return;
+
+    // Extract information from voice data
+    const speakerId = voice.speaker_id;
+    const gender = voice.gender;
+    const style = voice.style || "standard";
+    const temp = voice.temperature;
+    const topk = voice.topk;
+
+    // Use character information from voice data
+    const characterName = voice.character_name || `Speaker ${speakerId}`;
+    const characterTitle = voice.character_role || `${gender.charAt(0).toUpperCase() + gender.slice(1)} Voice Artist`;
+    const characterDescription = voice.character_description || 
+        `A professionally trained ${gender} voice actor with expertise in ${style} performances.`;
+
+    // Update the UI
+    document.getElementById('character-name').textContent = characterName;
+    document.getElementById('character-title').textContent = characterTitle;
+    document.getElementById('character-description').textContent = characterDescription;
+    document.getElementById('voice-gender-info').textContent = `${gender.toUpperCase()} (${voice.gender_confidence || 95}% confidence)`;
+    document.getElementById('voice-params').textContent = `temp: ${temp}, topk: ${topk}`;
+    document.getElementById('voice-style').textContent = `Style: ${style}`;
+    document.getElementById('voice-id').textContent = `Speaker ID: ${speakerId}`;
+
+    // Update sample audio
+    const sampleAudio = document.getElementById('sample-audio');
+    sampleAudio.src = voiceId;
+    sampleAudio.load();
+
+    logDebug(`Updated character information for: ${characterName}`);
+}
+
+// Function to check if a file exists by making a HEAD request
+async function checkFileExists(url) {
+    try {
+        const response = await fetch(url, { method: 'HEAD' });
+        return {
+            exists: response.ok,
+            status: response.status,
+            statusText: response.statusText,
+            contentType: response.headers.get('Content-Type'),
+            contentLength: response.headers.get('Content-Length')
+        };
+    } catch (error) {
+        return {
+            exists: false,
+            error: error.message
+        };
+    }
+}
+
+// Function to add file check result
+function addFileCheckResult(message, status) {
+    document.getElementById('file-check-panel').style.display = 'block';
+    const resultsContainer = document.getElementById('file-check-results');
+    const resultEntry = document.createElement('div');
+    resultEntry.className = `file-check-result check-${status}`;
+    resultEntry.textContent = message;
+    resultsContainer.appendChild(resultEntry);
+}
+
+// Perform comprehensive file checks
+async function performFileChecks(audioPath) {
+    const fileCheckPanel = document.getElementById('file-check-panel');
+    const fixAction = document.getElementById('fix-action');
+    fileCheckPanel.style.display = 'block';
+    document.getElementById('file-check-results').innerHTML = '';
+    fixAction.style.display = 'none';
+    fixAction.innerHTML = '';
+
+    // Normalize path
+    const normalizedPath = audioPath.startsWith('/') ? audioPath : '/' + audioPath;
+    const filename = normalizedPath.split('/').pop();
+
+    // Check the original path
+    logDebug(`Checking file accessibility at: ${audioPath}`);
+    const fileCheck = await checkFileExists(audioPath);
+
+    if (fileCheck.exists) {
+        addFileCheckResult(`✅ File is accessible at ${audioPath}`, 'success');
+        addFileCheckResult(`   Content-Type: ${fileCheck.contentType}`, 'info');
+        addFileCheckResult(`   Content-Length: ${fileCheck.contentLength} bytes`, 'info');
+        return true;
+    } else {
+        addFileCheckResult(`❌ File not accessible at ${audioPath}: ${fileCheck.status} ${fileCheck.statusText || fileCheck.error}`, 'error');
+
+        // Try with a different base path
+        const altPath = `/audio/${filename}`;
+        logDebug(`Trying alternate path: ${altPath}`);
+        const altCheck = await checkFileExists(altPath);
+
+        if (altCheck.exists) {
+            addFileCheckResult(`✅ File is accessible at alternate path: ${altPath}`, 'success');
+            addFileCheckResult(`   Content-Type: ${altCheck.contentType}`, 'info');
+            addFileCheckResult(`   Content-Length: ${altCheck.contentLength} bytes`, 'info');
+
+            // Show fix action
+            fixAction.style.display = 'block';
+            fixAction.innerHTML = `<p><strong>Fix:</strong> Use this alternate URL instead: <code>${altPath}</code></p>
+                                  <button id="use-alt-path">Use This Path</button>`;
+
+            document.getElementById('use-alt-path').addEventListener('click', function() {
+                document.getElementById('generated-audio').src = altPath;
+                document.getElementById('generated-audio').load();
+                document.getElementById('generated-audio-container').style.display = 'block';
+                logDebug(`Updated audio source to alternate path: ${altPath}`, 'info');
+            });
+
+            return true;
+        }
+
+        // Give up - propose testing with curl
+        addFileCheckResult(`❌ File not found at any tested path`, 'error');
+        fixAction.style.display = 'block';
+        fixAction.innerHTML = `<p><strong>Debugging suggestion:</strong> Check the server with:</p>
+                              <pre>curl -I "http://${location.host}/${normalizedPath.substring(1)}"</pre>`;
+
+        return false;
+    }
+}
+
+// Generate TTS using the server API
+async function generateTTS(voicePath, text, device) {
+    logDebug(`Generating TTS for voice: ${voicePath}`);
+    logDebug(`Text: ${text}`);
+    logDebug(`Device: ${device}`);
+
+    try {
+        // Call the TTS API endpoint
+        logDebug(`Sending request to /api/tts`);
+        const response = await fetch('/api/tts', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                voice: voicePath,
+                text: text,
+                device: device
+            })
+        });
+
+        if (!response.ok) {
+            const errorText = await response.text();
+            logDebug(`HTTP error! status: ${response.status}, response: ${errorText}`, 'error');
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const data = await response.json();
+        logDebug(`Got response: ${JSON.stringify(data)}`);
+
+        if (data.task_id) {
+            // Start polling for task status
+            let attempts = 0;
+
+            while (true) {
+                try {
+                    const statusResponse = await fetch(`/api/status/${data.task_id}`);
+                    if (!statusResponse.ok) {
+                        logDebug(`Error checking status: ${statusResponse.status}`, 'error');
+                        // Wait and retry on network errors
+                        await new Promise(resolve => setTimeout(resolve, 1000));
+                        continue;
+                    }
+
+                    const statusData = await statusResponse.json();
+                    logDebug(`Task status: ${statusData.status}, progress: ${statusData.progress}%`);
+
+                    // Update the status message with progress
+                    updateStatus(`Generating speech... ${statusData.progress}%`, 'generating');
+
+                    if (statusData.status === 'complete') {
+                        return statusData.output;
+                    } else if (statusData.status === 'error') {
+                        throw new Error(statusData.error || 'Generation failed');
+                    }
+                } catch (error) {
+                    // Only throw if it's not a network error
+                    if (error.message !== 'Failed to fetch') {
+                        throw error;
+                    }
+                    logDebug(`Network error checking status. Retrying...`, 'error');
+                }
+
+                // Wait 1 second before next poll
+                await new Promise(resolve => setTimeout(resolve, 1000));
+            }
+        } else {
+            throw new Error('No task ID received');
+        }
+    } catch (error) {
+        logDebug(`Error calling TTS API: ${error.message}`, 'error');
+        throw error;
+    }
+}
+
+// Load voice data from server
+async function loadVoiceData() {
+    logDebug('Loading voice data from server...');
+
+    try {
+        // The voice selector's options are rendered into the page by the
+        // server; the JSON is still needed for the character info lookups
+        const response = await fetch('/api/voices');
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        voiceData = await response.json();
+        voiceIndex = new Map(voiceData.map(v => [v.file_path, v]));
+        logDebug(`Loaded ${voiceData.length} voice entries`);
+    } catch (error) {
+        logDebug(`Error loading voice data: ${error.message}`, 'error');
+    }
+}
+
+// Run server diagnostic
+async function runDiagnostic() {
+    logDebug('Running server diagnostic...');
+
+    try {
+        const response = await fetch('/api/diagnostic');
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const data = await response.json();
+        logDebug('Diagnostic results:');
+
+        // Log system info
+        if (data.system) {
+            logDebug(`System: ${JSON.stringify(data.system)}`);
+        }
+
+        // Log torch info
+        if (data.torch) {
+            logDebug(`PyTorch: ${JSON.stringify(data.torch)}`);
+        }
+
+        // Log voice cloner info
+        if (data.voice_cloner) {
+            logDebug(`Voice Cloner: ${JSON.stringify(data.voice_cloner)}`);
+        }
+
+        // Log path checks
+        if (data.path_checks) {
+            logDebug(`Path Checks: ${JSON.stringify(data.path_checks)}`);
+        }
+
+        logDebug(`Status: ${data.status}`);
+    } catch (error) {
+        logDebug(`Error running diagnostic: ${error.message}`, 'error');
+    }
+}
+
+// Update status message
+function updateStatus(message, status) {
+    const statusElement = document.getElementById('status-message');
+    statusElement.textContent = message;
+    statusElement.className = 'tts-status';
+
+    if (status) {
+        statusElement.classList.add(`status-${status}`);
+    }
+
+    statusElement.style.display = 'block';
+}
+
+// Document ready
+document.addEventListener('DOMContentLoaded', () => {
+    logDebug('Page loaded, initializing...');
+
+    // Load voice data and auto-select first voice
+    loadVoiceData().then(() => {
+        // Auto-select the first voice after loading
+        const voiceSelector = document.getElementById('voice-selector');
+        if (voiceSelector.options.length > 1) {
+            voiceSelector.selectedIndex = 1;  // Select first voice (index 1 since index 0 is the placeholder)
+            updateCharacterInfo(voiceSelector.value);
+        }
+    });
+
+    // Set up voice selector change event
+    const voiceSelector = document.getElementById('voice-selector');
+    voiceSelector.addEventListener('change', function() {
+        if (this.value) {
+            updateCharacterInfo(this.value);
+        }
+    });
+
+    // Set up generate button click event
+    const generateBtn = document.getElementById('generate-btn');
+    generateBtn.addEventListener('click', async function() {
+        const textInput = document.getElementById('tts-text');
+        const text = textInput.value.trim();
+
+        if (!text) {
+            alert('Please enter some text to generate speech.');
+            return;
+        }
+
+        const voicePath = document.getElementById('voice-selector').value;
+        if (!voicePath) {
+            alert('Please select a voice first.');
+            return;
+        }
+
+        const device = document.getElementById('device').value;
+        const loadingIndicator = document.getElementById('loading-indicator');
+        const generatedAudioContainer = document.getElementById('generated-audio-container');
+        const generatedAudio = document.getElementById('generated-audio');
+
+        // Reset file check panel
+        document.getElementById('file-check-panel').style.display = 'none';
+        document.getElementById('file-check-results').innerHTML = '';
+
+        // Show loading indicator and update status
+        loadingIndicator.style.display = 'inline-block';
+        updateStatus('Starting TTS generation...', 'starting');
+        generateBtn.disabled = true;
+
+        try {
+            // Check server health
+            logDebug('Checking server health...');
+            try {
+                const healthCheck = await fetch('/api/health');
+                if (!healthCheck.ok) {
+                    logDebug('Server health check failed', 'error');
+                    updateStatus('Server may be down. Please wait a moment and try again.', 'error');
+                    return;
+                }
+                logDebug('Server is healthy');
+            } catch (error) {
+                logDebug('Cannot connect to server', 'error');
+                updateStatus('Cannot connect to server. Please ensure it is running.', 'error');
+                return;
+            }
+
+            // Generate TTS
+            updateStatus('Generating speech...', 'generating');
+            const outputPath = await generateTTS(voicePath, text, device);
+
+            // Update audio source and display player
+            const audioUrl = `/audio/${outputPath.split('/').pop()}`;
+            generatedAudio.src = audioUrl;
+            generatedAudio.load();
+            generatedAudioContainer.style.display = 'block';
+
+            // Update status
+            updateStatus('Speech generated successfully!', 'success');
+
+            // Perform file checks
+            await performFileChecks(audioUrl);
+        } catch (error) {
+            logDebug(`TTS generation failed: ${error.message}`, 'error');
+            updateStatus(`Error: ${error.message}`, 'error');
+        } finally {
+            // Hide loading indicator and re-enable button
+            loadingIndicator.style.display = 'none';
+            generateBtn.disabled = false;
+        }
+    });
+
+    // Add diagnostic button
+    const debugPanel = document.querySelector('.debug-panel');
+    const diagnosticSection = document.createElement('div');
+    diagnosticSection.style.marginTop = '20px';
+    diagnosticSection.style.borderTop = '1px solid #ddd';
+    diagnosticSection.style.paddingTop = '10px';
+    diagnosticSection.innerHTML = `
+        <h3>Server Diagnostics</h3>
+        <button id="run-diagnostic" class="tts-generate">Run Server Diagnostic</button>
+    `;
+    debugPanel.appendChild(diagnosticSection);
+
+    // Set up diagnostic button click event
+    document.getElementById('run-diagnostic').addEventListener('click', runDiagnostic);
+});
@@ -8,15 +8,11 @@ It allows generating speech from text using either of the available models.
 
 import os
 import sys
+import re
 import argparse
 import logging
 from pathlib import Path
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger("test_generation")
 
 # Add the project directory to the path so we can import our modules
@@ -43,18 +39,27 @@ def main():
                         help="Device to use for TTS generation")
     parser.add_argument("--voice", default=None,
                         help="Path to voice sample file (optional)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Split the text into sentences and generate them in one CSM run")
+    parser.add_argument("--precision", choices=["bf16", "fp16", "fp32"], default=None,
+                        help="Model precision (defaults to bf16 for the simple model, the generator's default for CSM)")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Enable debug logging")
     
     args = parser.parse_args()
     
+    # Set up logging
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
     # Use an even shorter text for CPU tests
     if args.device == "cpu" and args.text == "Hello world.":
         args.text = "Test."
         logger.info(f"Using shorter text for CPU test: '{args.text}'")
     
-    # Create output directory if it doesn't exist
-    output_dir = os.path.join(script_dir, "voices", "output")
-    os.makedirs(output_dir, exist_ok=True)
-
+    # The VoiceCloner and CSMModelAdapter constructors create their output directories
     if args.model == "simple":
         logger.info("Using simple voice cloner model")
         try:
@@ -72,7 +77,8 @@ def main():
                         logger.info(f"Using sample voice file: {voice_file}")
             
             # Generate speech
-            output_file = vc.generate(args.text, voice_path=voice_file, device=args.device)
+            output_file = vc.generate(args.text, voice_path=voice_file, device=args.device,
+                                      precision=args.precision or "bf16")
             
             if output_file and os.path.exists(output_file):
                 print(f"Successfully generated speech at: {output_file}")
@@ -90,14 +96,28 @@ def main():
         try:
             adapter = CSMModelAdapter()
             
-            # Generate speech
-            output_file = adapter.generate_speech(args.text, voice_path=args.voice, device=args.device)
-            
-            if output_file and os.path.exists(output_file):
-                print(f"Successfully generated speech with CSM model at: {output_file}")
-                print(f"Text: \"{args.text}\"")
+            if args.batch:
+                # Generate all sentences with a single model load
+                sentences = [s for s in re.split(r'(?<=[.!?])\s+', args.text) if s]
+                output_files = adapter.generate_speech_batch(
+                    sentences, voice_paths=[args.voice] * len(sentences), device=args.device)
+                
+                for sentence, output_file in zip(sentences, output_files):
+                    if output_file and os.path.exists(output_file):
+                        print(f"Successfully generated speech with CSM model at: {output_file}")
+                        print(f"Text: \"{sentence}\"")
+                    else:
+                        print(f"Failed to generate speech with CSM model for: \"{sentence}\"")
             else:
-                print("Failed to generate speech with CSM model.")
+                # Generate speech
+                output_file = adapter.generate_speech(args.text, voice_path=args.voice, device=args.device,
+                                                      precision=args.precision)
+                
+                if output_file and os.path.exists(output_file):
+                    print(f"Successfully generated speech with CSM model at: {output_file}")
+                    print(f"Text: \"{args.text}\"")
+                else:
+                    print("Failed to generate speech with CSM model.")
                 
         except Exception as e:
             logger.exception(f"Error during CSM TTS generation: {e}")
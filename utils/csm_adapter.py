@@ -8,20 +8,26 @@ This allows reusing the existing voice generation functionality while providing
 
 import os
 import sys
+import errno
 import logging
 import subprocess
 import tempfile
 import json
+import glob
 import time
 import shutil
+import threading
+import uuid
+from collections import OrderedDict
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger("csm_adapter")
+try:
+    import torch
+except ImportError:
+    torch = None
+
+# Logging is configured by the entry point
+logger = logging.getLogger(__name__)
 
 # Paths to the movie_maker project
 MOVIE_MAKER_PATH = "/home/tdeshane/movie_maker"
@@ -29,6 +35,78 @@ VOICE_POC_PATH = os.path.join(MOVIE_MAKER_PATH, "voice_poc")
 VOICE_GENERATOR_SCRIPT = os.path.join(VOICE_POC_PATH, "run_voice_generator.sh")
 SCENES_OUTPUT_DIR = os.path.join(MOVIE_MAKER_PATH, "hdmy5movie_voices", "scenes")
 
+# Where generated clips are published for the web API
+OUTPUT_DIR = "/home/tdeshane/tts_poc/voices/output"
+
+# Index of previously generated clips, persisted so repeat texts skip generation across runs
+CACHE_INDEX_PATH = os.path.join(OUTPUT_DIR, "cache_index.json")
+
+# Maximum number of generated clips remembered in the result cache
+RESULT_CACHE_SIZE = 256
+
+# Model precisions the generator script accepts via --precision
+PRECISIONS = ("fp16", "bf16", "fp32")
+
+# How long a GPU memory probe result is reused before querying CUDA again
+GPU_PROBE_TTL_SECONDS = 2.0
+
+# How much of the end of a generator log is kept for error reporting
+LOG_TAIL_BYTES = 8192
+
+def _precision_args(precision):
+    """Return the generator script arguments for a model precision, or [] for its default."""
+    return [] if precision is None else ["--precision", precision]
+
+def _tail(path, nbytes=LOG_TAIL_BYTES):
+    """Return the last nbytes of a log file as text."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(max(os.path.getsize(path) - nbytes, 0))
+            return f.read().decode("utf-8", errors="replace")
+    except OSError as e:
+        return f"<log unavailable: {e}>"
+
+def _reported_output_path(log_path):
+    """Find an output .wav path reported in a generator log, or return None."""
+    with open(log_path, errors="replace") as f:
+        for line in f:
+            if "Output file:" in line or "Generated file:" in line or "Saved to:" in line:
+                parts = line.split(":", 1)
+                if len(parts) == 2:
+                    possible_path = parts[1].strip()
+                    if os.path.exists(possible_path) and possible_path.endswith('.wav'):
+                        logger.debug("Found output path from generator output: %s", possible_path)
+                        return possible_path
+    return None
+
+def _new_output_path(suffix=""):
+    """Return a clip path in OUTPUT_DIR that no other request will be handed."""
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    return os.path.join(OUTPUT_DIR, f"generated_{timestamp}_{uuid.uuid4().hex[:12]}{suffix}.wav")
+
+def _link_or_copy(src, dst):
+    """
+    Publish src as a new file dst without touching src; an existing dst is an error.
+    
+    Only clips we own, under OUTPUT_DIR, are hardlinked. Anything else is
+    copied: movie_maker rewrites its scene files in place when it reuses a
+    scene ID, which would silently change a linked clip too. A link also
+    falls back to a copy across filesystems (EXDEV) or where the filesystem
+    or permissions forbid it (EPERM).
+    """
+    if os.path.commonpath([os.path.realpath(src), os.path.realpath(OUTPUT_DIR)]) == os.path.realpath(OUTPUT_DIR):
+        try:
+            os.link(src, dst)
+            return "Linked"
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM):
+                raise
+    
+    # Claim the name with O_EXCL first, so a copy never replaces someone else's clip
+    os.close(os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+    shutil.copy2(src, dst)
+    return "Copied"
+
 class CSMModelAdapter:
     """
     Adapter for the CSM model from the movie_maker project.
@@ -42,18 +120,45 @@ class CSMModelAdapter:
             logger.error(f"Voice generator script not found: {VOICE_GENERATOR_SCRIPT}")
             raise FileNotFoundError(f"Voice generator script not found: {VOICE_GENERATOR_SCRIPT}")
         
-        # Ensure output directory exists
+        # Ensure output directories exist once, so generation never has to check
         os.makedirs(SCENES_OUTPUT_DIR, exist_ok=True)
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        
+        # Last GPU memory probe result and when it was taken
+        self._gpu_probe_ts = 0.0
+        self._gpu_probe_result = None
+        
+        # LRU cache of published clips keyed by (text, voice, device, precision)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._load_cache()
         
         logger.info(f"CSM Model Adapter initialized")
         logger.info(f"Using voice generator script: {VOICE_GENERATOR_SCRIPT}")
         logger.info(f"Using output directory: {SCENES_OUTPUT_DIR}")
     
     def check_gpu_memory(self):
-        """Check if CUDA is available and has enough memory."""
+        """
+        Check if CUDA is available and has enough memory.
+        
+        The result is reused for GPU_PROBE_TTL_SECONDS, since each probe queries
+        the device and synchronizes with it.
+        """
+        now = time.time()
+        if self._gpu_probe_result is not None and now - self._gpu_probe_ts < GPU_PROBE_TTL_SECONDS:
+            return self._gpu_probe_result
+        
+        self._gpu_probe_result = self._probe_gpu_memory()
+        self._gpu_probe_ts = now
+        return self._gpu_probe_result
+    
+    def _probe_gpu_memory(self):
+        """Query CUDA availability and free memory."""
         try:
-            # Try to import torch to check CUDA
-            import torch
+            if torch is None:
+                logger.info("PyTorch not installed, using CPU")
+                return False, "PyTorch not installed"
+            
             if not torch.cuda.is_available():
                 logger.info("CUDA not available, using CPU")
                 return False, "CUDA not available"
@@ -74,7 +179,129 @@ class CSMModelAdapter:
             logger.warning(f"Error checking GPU memory: {e}")
             return False, f"Error checking GPU: {str(e)}"
     
-    def generate_speech(self, text, voice_path=None, device="auto"):
+    def _find_scene_output(self, scene_id, since):
+        """
+        Locate the .wav generated for a scene ID, or return None.
+        
+        Scene IDs repeat every 10 seconds and the scenes directory belongs to
+        movie_maker, so only files named exactly for this scene and modified
+        at or after since (the time the generator was started) are accepted.
+        """
+        def is_fresh(path):
+            try:
+                return os.stat(path).st_mtime >= since
+            except OSError:
+                return False
+        
+        # Since the scene ID is ours, the output name is predictable
+        potential_paths = [
+            os.path.join(SCENES_OUTPUT_DIR, f"scene_{scene_id}.wav"),
+            os.path.join(SCENES_OUTPUT_DIR, f"scene{scene_id}.wav"),
+            os.path.join(SCENES_OUTPUT_DIR, f"{scene_id}.wav"),
+            os.path.join(VOICE_POC_PATH, f"output_{scene_id}.wav"),
+            os.path.join(VOICE_POC_PATH, f"scene_{scene_id}.wav")
+        ]
+        
+        for path in potential_paths:
+            if is_fresh(path):
+                logger.debug("Found output using pattern matching: %s", path)
+                return path
+        
+        # Otherwise a suffixed name for this scene (scene_<id>_*.wav), newest first
+        for check_dir in [SCENES_OUTPUT_DIR, VOICE_POC_PATH]:
+            matches = [path for path in glob.iglob(os.path.join(check_dir, f"scene_{scene_id}_*.wav"))
+                       if is_fresh(path)]
+            if matches:
+                path = max(matches, key=os.path.getmtime)
+                logger.debug("Found output using scene ID glob: %s", path)
+                return path
+        
+        return None
+    
+    def _publish(self, output_path, suffix=""):
+        """
+        Copy a generated file into our output directory and return its new path.
+        
+        The source is left in place, since it lives in movie_maker's directories,
+        and isn't linked, since movie_maker may rewrite it later. Each call gets
+        a new, uniquely named file, so clips finished in the same second never
+        replace each other.
+        """
+        final_output = _new_output_path(suffix)
+        action = _link_or_copy(output_path, final_output)
+        logger.info(f"{action} output to: {final_output}")
+        return final_output
+    
+    def _cache_key(self, text, voice_path, device, precision):
+        """Build the result cache key for a generation request."""
+        voice = os.path.realpath(voice_path) if voice_path else None
+        return (text, voice, device, precision)
+    
+    def _load_cache(self):
+        """Load the result cache index written by a previous run, if any."""
+        try:
+            with open(CACHE_INDEX_PATH) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache index {CACHE_INDEX_PATH}: {e}")
+            return
+        
+        for key, path in entries[-RESULT_CACHE_SIZE:]:
+            self._cache[tuple(key)] = path
+        logger.info(f"Loaded {len(self._cache)} cached clips from {CACHE_INDEX_PATH}")
+    
+    def _save_cache(self):
+        """Write the result cache index; must be called with _cache_lock held."""
+        try:
+            tmp_path = CACHE_INDEX_PATH + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump([[list(key), path] for key, path in self._cache.items()], f)
+            os.replace(tmp_path, CACHE_INDEX_PATH)
+        except Exception as e:
+            logger.warning(f"Failed to save cache index: {e}")
+    
+    def _get_cached(self, key):
+        """
+        Return a fresh copy of a previously generated clip, or None on a miss.
+        
+        The cached clip is hardlinked to a new timestamped name, so callers get
+        their own file without any inference or copying.
+        """
+        with self._cache_lock:
+            path = self._cache.get(key)
+            if path is None:
+                return None
+            if not os.path.exists(path):
+                # The clip was deleted from the output directory
+                del self._cache[key]
+                self._save_cache()
+                return None
+            self._cache.move_to_end(key)
+        
+        final_output = _new_output_path()
+        _link_or_copy(path, final_output)
+        logger.info(f"Reused cached clip {path} as {final_output}")
+        return final_output
+    
+    def _put_cached(self, key, path):
+        """Remember a published clip for the given request key."""
+        with self._cache_lock:
+            self._cache[key] = path
+            self._cache.move_to_end(key)
+            if len(self._cache) > RESULT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+            self._save_cache()
+    
+    def _prepare_text(self, text):
+        """For very short texts, add a period if missing to ensure proper TTS."""
+        if len(text) < 10 and not text.endswith(('.', '!', '?')):
+            text = text + "."
+            logger.debug("Added period to short text: '%s'", text)
+        return text
+    
+    def generate_speech(self, text, voice_path=None, device="auto", precision=None):
         """
         Generate speech using the CSM model.
         
@@ -82,34 +309,34 @@ class CSMModelAdapter:
             text: The text to convert to speech
             voice_path: Path to the voice sample file (or None to use default)
             device: 'cuda', 'cpu', or 'auto'
+            precision: 'bf16', 'fp16', 'fp32', or None for the generator's default;
+                bf16 suits Ampere and newer GPUs, fp16 older ones such as Volta
             
         Returns:
             Path to the generated audio file or None if failed
         """
+        if precision is not None and precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision: {precision} (expected one of {PRECISIONS})")
+        
         start_time = time.time()
         
-        # For very short texts, add a period if missing to ensure proper TTS
-        if len(text) < 10 and not text.endswith(('.', '!', '?')):
-            text = text + "."
-            logger.debug(f"Added period to short text: '{text}'")
+        text = self._prepare_text(text)
+        
+        cache_key = self._cache_key(text, voice_path, device, precision)
+        cached_output = self._get_cached(cache_key)
+        if cached_output:
+            return cached_output
         
         logger.info(f"Generating speech for text: {text}")
         
         # Use a scene ID based on timestamp to avoid collisions
         scene_id = int(time.time() * 1000) % 10000
         
-        # Create a JSON prompts file in the expected format
-        prompts_file = None
+        # Prompts in the expected format, scene_id as key and text as value; they
+        # are piped to the script on stdin rather than written to a temp file
+        prompts_json = json.dumps({str(scene_id): text})
+        
         try:
-            # Create a temporary file for the prompts
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as temp:
-                # Format as JSON with scene_id as key and text as value
-                import json
-                json.dump({str(scene_id): text}, temp)
-                prompts_file = temp.name
-            
-            logger.debug(f"Created prompts file: {prompts_file}")
-            
             # Determine device - for very short texts, CPU might be faster due to startup time
             if device == "auto":
                 if len(text) < 5:  # For extremely short texts, CPU might be faster
@@ -119,120 +346,82 @@ class CSMModelAdapter:
                     cuda_available, _ = self.check_gpu_memory()
                     device = "cuda" if cuda_available else "cpu"
             
-            # Build the command
-            cmd = [
-                VOICE_GENERATOR_SCRIPT,
-                "--scene", str(scene_id),
-                "--device", device,
-                "--output", SCENES_OUTPUT_DIR,
-                "--prompts", prompts_file
-            ]
-            
-            logger.info(f"Running voice generation with device: {device}")
-            
-            # Run the command
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=VOICE_POC_PATH
-            )
-            
-            # Wait for the process to complete
-            stdout, stderr = process.communicate()
-            
-            # Only log details if there's an error or we're at debug level
-            if process.returncode != 0:
-                logger.error(f"STDOUT: {stdout}")
-                logger.error(f"STDERR: {stderr}")
-            else:
-                logger.debug(f"STDOUT: {stdout}")
-                if stderr:
-                    logger.debug(f"STDERR: {stderr}")
-            
-            # Check the return code
-            if process.returncode != 0:
-                logger.error(f"Voice generation failed with return code: {process.returncode}")
+            # Try the chosen device first and fall back to CPU on CUDA OOM,
+            # reusing the same scene ID and prompts for every attempt
+            device_sequence = [device, "cpu"] if device == "cuda" else [device]
+            for device in device_sequence:
+                # Build the command
+                cmd = [
+                    VOICE_GENERATOR_SCRIPT,
+                    "--scene", str(scene_id),
+                    "--device", device,
+                    "--output", SCENES_OUTPUT_DIR,
+                    "--prompts", "/dev/stdin"
+                ] + _precision_args(precision)
                 
-                # Check for typical errors
-                if "CUDA out of memory" in stderr:
-                    logger.warning("CUDA out of memory error detected")
-                    if device == "cuda":
-                        logger.info("CUDA failed, falling back to CPU")
-                        # Recursive call with CPU device
-                        return self.generate_speech(text, voice_path, device="cpu")
+                logger.info(f"Running voice generation with device: {device}")
                 
-                if "No prompt found for scene" in stdout or "No prompt found for scene" in stderr:
-                    logger.error("Prompt file format error detected")
+                # Run the command, sending its output to a log file rather than buffering it
+                started = time.time()
+                # mkstemp gives each run its own log, even when scene IDs repeat
+                log_fd, log_path = tempfile.mkstemp(prefix=f"csm_scene_{scene_id}_{device}_", suffix=".log")
+                with os.fdopen(log_fd, "wb") as log_file:
+                    process = subprocess.Popen(
+                        cmd,
+                        stdin=subprocess.PIPE,
+                        stdout=log_file,
+                        stderr=subprocess.STDOUT,
+                        cwd=VOICE_POC_PATH
+                    )
+                    
+                    # Wait for the process to complete
+                    process.communicate(input=prompts_json.encode())
                 
-                return None
-            
-            logger.info(f"Voice generation command succeeded")
-            
-            # Look for specific output patterns in the stdout to find the file path
-            output_path = None
-            for line in stdout.splitlines():
-                if "Output file:" in line or "Generated file:" in line or "Saved to:" in line:
-                    parts = line.split(":", 1)
-                    if len(parts) == 2:
-                        possible_path = parts[1].strip()
-                        if os.path.exists(possible_path) and possible_path.endswith('.wav'):
-                            output_path = possible_path
-                            logger.debug(f"Found output path from stdout: {output_path}")
-                            break
-            
-            # If we didn't find it in stdout, check various locations
-            if not output_path or not os.path.exists(output_path):
-                # Try standard patterns
-                potential_paths = [
-                    os.path.join(SCENES_OUTPUT_DIR, f"scene_{scene_id}.wav"),
-                    os.path.join(SCENES_OUTPUT_DIR, f"scene{scene_id}.wav"),
-                    os.path.join(SCENES_OUTPUT_DIR, f"{scene_id}.wav"),
-                    os.path.join(VOICE_POC_PATH, f"output_{scene_id}.wav"),
-                    os.path.join(VOICE_POC_PATH, f"scene_{scene_id}.wav")
-                ]
+                # Check the return code
+                if process.returncode != 0:
+                    log_tail = _tail(log_path)
+                    logger.error(f"Voice generation failed with return code: {process.returncode}")
+                    logger.error(f"Output (end of {log_path}): {log_tail}")
+                    
+                    # Check for typical errors
+                    if "CUDA out of memory" in log_tail:
+                        logger.warning("CUDA out of memory error detected")
+                        # Free memory has changed, so re-probe on the next call
+                        self._gpu_probe_result = None
+                        if device == "cuda":
+                            logger.info("CUDA failed, falling back to CPU")
+                            continue
+                    
+                    if "No prompt found for scene" in log_tail:
+                        logger.error("Prompt file format error detected")
+                    
+                    return None
+                
+                logger.info(f"Voice generation command succeeded")
                 
-                for path in potential_paths:
-                    if os.path.exists(path):
-                        output_path = path
-                        logger.debug(f"Found output using pattern matching: {output_path}")
-                        break
+                # The path the script reported is authoritative
+                output_path = _reported_output_path(log_path)
                 
-                # If still not found, look for any new .wav files
+                # Otherwise check the locations named after our scene ID
                 if not output_path:
-                    # Check if any new .wav files were created in the last 30 seconds
-                    current_time = time.time()
-                    newest_file = None
-                    newest_time = 0
-                    
-                    # Check both directories
-                    for check_dir in [SCENES_OUTPUT_DIR, VOICE_POC_PATH]:
-                        if os.path.exists(check_dir):
-                            for filename in os.listdir(check_dir):
-                                filepath = os.path.join(check_dir, filename)
-                                if filename.endswith('.wav') and os.path.isfile(filepath):
-                                    file_mtime = os.path.getmtime(filepath)
-                                    if current_time - file_mtime < 30 and file_mtime > newest_time:
-                                        newest_time = file_mtime
-                                        newest_file = filepath
+                    output_path = self._find_scene_output(scene_id, started)
+                
+                # Keep the log around when debugging
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Generator output logged to %s", log_path)
+                else:
+                    os.unlink(log_path)
+                
+                break
                 
-                    if newest_file:
-                        output_path = newest_file
-                        logger.debug(f"Found newest output file: {output_path}")
-            
             if not output_path or not os.path.exists(output_path):
                 logger.error(f"Output file not found after exhaustive search")
                 return None
             
             logger.info(f"Generated speech saved to: {output_path}")
             
-            # Copy to our output directory
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            final_output = f"/home/tdeshane/tts_poc/voices/output/generated_{timestamp}.wav"
-            shutil.copy2(output_path, final_output)
-            
-            logger.info(f"Copied output to: {final_output}")
+            final_output = self._publish(output_path)
+            self._put_cached(cache_key, final_output)
             
             elapsed_time = time.time() - start_time
             logger.info(f"Speech generation completed in {elapsed_time:.2f} seconds")
@@ -242,18 +431,95 @@ class CSMModelAdapter:
         except Exception as e:
             logger.exception(f"Error generating speech: {e}")
             return None
+    
+    def generate_speech_batch(self, texts, voice_paths=None, device="auto"):
+        """
+        Generate speech for several texts with a single generator run.
+        
+        All texts go into one prompts dict keyed by scene ID, and the script is
+        run without --scene so it renders every prompt in one process, loading
+        the model once for the whole batch. Any text whose output can't be found
+        afterwards is retried on its own through generate_speech.
+        
+        Args:
+            texts: List of texts to convert to speech
+            voice_paths: List of voice sample paths, one per text (or None to use default)
+            device: 'cuda', 'cpu', or 'auto'
+            
+        Returns:
+            List of paths to the generated audio files, with None for failed texts
+        """
+        if not texts:
+            return []
+        if voice_paths is None:
+            voice_paths = [None] * len(texts)
+        
+        start_time = time.time()
+        texts = [self._prepare_text(text) for text in texts]
+        
+        # Consecutive scene IDs based on timestamp to avoid collisions
+        base_id = int(time.time() * 1000) % 10000
+        scene_ids = [(base_id + i) % 10000 for i in range(len(texts))]
+        
+        if device == "auto":
+            cuda_available, _ = self.check_gpu_memory()
+            device = "cuda" if cuda_available else "cpu"
+        
+        output_paths = [None] * len(texts)
+        prompts_json = json.dumps({str(scene_id): text for scene_id, text in zip(scene_ids, texts)})
+        cmd = [
+            VOICE_GENERATOR_SCRIPT,
+            "--device", device,
+            "--output", SCENES_OUTPUT_DIR,
+            "--prompts", "/dev/stdin"
+        ]
+        
+        logger.info(f"Running batch voice generation for {len(texts)} texts with device: {device}")
+        
+        try:
+            started = time.time()
+            log_fd, log_path = tempfile.mkstemp(prefix=f"csm_batch_{base_id}_{device}_", suffix=".log")
+            with os.fdopen(log_fd, "wb") as log_file:
+                process = subprocess.run(
+                    cmd,
+                    input=prompts_json.encode(),
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT,
+                    cwd=VOICE_POC_PATH
+                )
+            
+            if process.returncode != 0:
+                log_tail = _tail(log_path)
+                logger.error(f"Batch voice generation failed with return code: {process.returncode}")
+                logger.error(f"Output (end of {log_path}): {log_tail}")
+                if "CUDA out of memory" in log_tail:
+                    self._gpu_probe_result = None
+            elif not logger.isEnabledFor(logging.DEBUG):
+                os.unlink(log_path)
+            
+            output_paths = [self._find_scene_output(scene_id, started) for scene_id in scene_ids]
+        except Exception as e:
+            logger.exception(f"Error running batch voice generation: {e}")
+        
+        results = []
+        for i, (output_path, text, voice_path) in enumerate(zip(output_paths, texts, voice_paths)):
+            if output_path is None:
+                logger.warning(f"No batch output for scene {scene_ids[i]}, generating it individually")
+                results.append(self.generate_speech(text, voice_path, device))
+            else:
+                results.append(self._publish(output_path, f"_{i}"))
+        
+        elapsed_time = time.time() - start_time
+        logger.info(f"Batch speech generation of {len(texts)} texts completed in {elapsed_time:.2f} seconds")
         
-        finally:
-            # Clean up temporary prompts file
-            if prompts_file and os.path.exists(prompts_file):
-                try:
-                    os.unlink(prompts_file)
-                    logger.debug(f"Removed temporary prompts file: {prompts_file}")
-                except Exception as e:
-                    logger.warning(f"Failed to remove temporary file: {e}")
+        return results
 
 # Test code
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
     adapter = CSMModelAdapter()
     output = adapter.generate_speech("This is a test of the CSM model adapter. Let's see if it works!")
     if output:
@@ -7,34 +7,61 @@ A self-contained module for voice cloning with proper fallback mechanisms.
 import os
 import sys
 import time
-import torch
 import logging
-import tempfile
+import pickle
 import subprocess
-import torchaudio
 import shutil
+import uuid
 from datetime import datetime
 from pathlib import Path
 import numpy as np
 import soundfile as sf
 from huggingface_hub import hf_hub_download
 import re
+import functools
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger("voice_cloner")
+# Logging is configured by the entry point
+logger = logging.getLogger(__name__)
+
+# ioctl request to share a file's extents with another (Linux FICLONE)
+_FICLONE = 0x40049409
+
+def _copy_file(src, dst):
+    """
+    Copy src to dst without moving the data through user space.
+    
+    A reflink is tried first, which is near-instant on btrfs and XFS; other
+    filesystems fall back to shutil.copy2, which copies in the kernel with
+    sendfile on Linux.
+    """
+    try:
+        import fcntl
+        with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+            fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+        shutil.copystat(src, dst)
+    except (ImportError, OSError):
+        shutil.copy2(src, dst)
+
+def _resolve_device(device):
+    """Turn 'auto', 'cuda' or 'cpu' (or None, meaning auto) into a torch.device."""
+    import torch
+    
+    if device is None or device == "auto":
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+    return torch.device(device)
+
+# Voice parameters encoded in sample filenames (speaker_1_temp_0.5_topk_80_...)
+_VOICE_PARAM_RE = re.compile(r'speaker_(\d+)_temp_([\d.]+)_topk_(\d+)')
 
 # Monkey patch the watermarking module to avoid the missing file error
 def monkey_patch_watermarking():
     """
     Create a mock implementation of the watermarking functionality to avoid errors.
-    This is inserted at import time before any modules that depend on it are loaded.
+    
+    A stub silentcipher module is registered in sys.modules, so any later
+    import of it resolves to the stub without hooking every other import.
     """
-    import builtins
-    original_import = builtins.__import__
+    import types
     
     class MockWatermarker:
         """Mock watermarker that does nothing but provides the expected interface."""
@@ -50,25 +77,41 @@ def monkey_patch_watermarking():
             return audio, 24000  # Standard sample rate
 
     # Create a mock silentcipher module
-    class MockSilentcipher:
-        server = type('Server', (), {'Model': MockWatermarker})
-        
-        @staticmethod
-        def get_model(*args, **kwargs):
-            return MockWatermarker()
+    silentcipher = types.ModuleType('silentcipher')
+    silentcipher.server = type('Server', (), {'Model': MockWatermarker})
+    silentcipher.get_model = lambda *args, **kwargs: MockWatermarker()
     
-    # Override imports for silentcipher
-    def patched_import(name, *args, **kwargs):
-        if name == 'silentcipher':
-            return MockSilentcipher()
-        else:
-            return original_import(name, *args, **kwargs)
-    
-    builtins.__import__ = patched_import
+    sys.modules['silentcipher'] = silentcipher
+    sys.modules['silentcipher.server'] = silentcipher.server
 
 # Apply monkey patch before importing other modules
 monkey_patch_watermarking()
 
+@functools.lru_cache(maxsize=1)
+def _find_snapshot_checkpoint():
+    """Return the checkpoint in the latest cached sesame/csm-1b snapshot, or None."""
+    # Get the snapshot path
+    cache_dir = os.path.expanduser("~/.cache/huggingface/hub")
+    model_dir = os.path.join(cache_dir, "models--sesame--csm-1b")
+    
+    # Find the snapshot directory
+    snapshot_dir = os.path.join(model_dir, "snapshots")
+    if not os.path.exists(snapshot_dir):
+        return None
+    
+    # Find the most recent snapshot; snapshot names are commit hashes, so
+    # recency comes from the modification time rather than the name
+    with os.scandir(snapshot_dir) as it:
+        latest = max((e for e in it if e.is_dir()), key=lambda e: e.stat().st_mtime, default=None)
+    if latest is None:
+        return None
+    
+    with os.scandir(latest.path) as it:
+        model_path = next((e.path for e in it if e.name.endswith(('.pt', '.ckpt'))), None)
+    if model_path:
+        logging.info(f"Found checkpoint in snapshot: {model_path}")
+    return model_path
+
 class VoiceCloner:
     """
     Handles voice cloning with proper fallback mechanisms.
@@ -77,7 +120,8 @@ class VoiceCloner:
     def __init__(self, 
                  input_voice_dir=None, 
                  output_dir=None,
-                 model_path=None):
+                 model_path=None,
+                 compile_model=False):
         """
         Initialize the voice cloner.
         
@@ -85,12 +129,27 @@ class VoiceCloner:
             input_voice_dir: Directory containing input voice samples
             output_dir: Directory to save generated voices
             model_path: Path to model checkpoint or None to use default
+            compile_model: Compile the CSM transformers with torch.compile
         """
         # Set up directories
         self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.input_voice_dir = input_voice_dir or os.path.join(self.base_dir, "voices", "input")
         self.output_dir = output_dir or os.path.join(self.base_dir, "voices", "output")
         self.model_path = model_path
+        self.compile_model = compile_model
+        
+        # Make the CSM modules importable once, rather than on every generation
+        self._csm_dir = os.path.join(self.base_dir, 'voice_poc/csm')
+        if self._csm_dir not in sys.path:
+            sys.path.insert(0, self._csm_dir)
+            logger.info(f"Added {self._csm_dir} to Python path")
+        
+        # Checkpoint to load, or None if it still has to be downloaded
+        self._checkpoint_path = self._resolve_checkpoint()
+        
+        # CSM generators by (device, dtype), each built on first use and reused across
+        # calls, so alternating CPU and GPU requests don't reload the model
+        self._generators = {}
         
         # Ensure directories exist
         os.makedirs(self.input_voice_dir, exist_ok=True)
@@ -99,18 +158,31 @@ class VoiceCloner:
         logger.info(f"Voice Cloner initialized with input_dir={self.input_voice_dir}, output_dir={self.output_dir}")
     
     def _generate_output_filename(self, prefix="generated", extension=".wav"):
-        """Generate a unique output filename with timestamp."""
+        """Generate a unique output filename with timestamp; the random suffix keeps same-second names apart."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        return f"{prefix}_{timestamp}{extension}"
+        return f"{prefix}_{timestamp}_{uuid.uuid4().hex[:8]}{extension}"
     
-    def _write_text_to_temp_file(self, text):
-        """Write text to a temporary file and return the file path."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as temp:
-            temp.write(text)
-            temp_path = temp.name
-        
-        logger.debug(f"Text written to temporary file: {temp_path}")
-        return temp_path
+    def _audio_duration(self, path):
+        """
+        Return (duration in seconds, sample rate) for an audio file.
+        
+        Only the header is read, with libsndfile for WAVs and torchaudio for
+        other formats; the file is fully decoded only if the header can't be
+        parsed on its own, so damaged files are still rejected.
+        """
+        try:
+            if path.lower().endswith(".wav"):
+                info = sf.info(path)
+                return info.frames / info.samplerate, info.samplerate
+            # torchaudio is only imported when it is needed, as it pulls in torch
+            import torchaudio
+            info = torchaudio.info(path)
+            return info.num_frames / info.sample_rate, info.sample_rate
+        except Exception as e:
+            logger.debug("Could not read header of %s, decoding instead: %s", path, e)
+            import torchaudio
+            waveform, sample_rate = torchaudio.load(path)
+            return waveform.shape[1] / sample_rate, sample_rate
     
     def _check_voice_file(self, voice_path):
         """Check if a voice file exists and is valid."""
@@ -119,9 +191,8 @@ class VoiceCloner:
             return False
         
         try:
-            # Try to load the file to verify it's a valid audio file
-            waveform, sample_rate = torchaudio.load(voice_path)
-            logger.debug(f"Voice file validated: {voice_path} ({waveform.shape[1]/sample_rate:.2f}s, {sample_rate}Hz)")
+            duration, sample_rate = self._audio_duration(voice_path)
+            logger.debug("Voice file validated: %s (%.2fs, %sHz)", voice_path, duration, sample_rate)
             return True
         except Exception as e:
             logger.error(f"Invalid voice file {voice_path}: {e}")
@@ -140,9 +211,8 @@ class VoiceCloner:
             return False
         
         try:
-            # Try to load the file to verify it's a valid audio file
-            waveform, sample_rate = torchaudio.load(output_path)
-            logger.debug(f"Output file validated: {output_path} ({waveform.shape[1]/sample_rate:.2f}s, {sample_rate}Hz)")
+            duration, sample_rate = self._audio_duration(output_path)
+            logger.debug("Output file validated: %s (%.2fs, %sHz)", output_path, duration, sample_rate)
             return True
         except Exception as e:
             logger.error(f"Invalid output file {output_path}: {e}")
@@ -151,7 +221,11 @@ class VoiceCloner:
     def _fallback_copy_original(self, voice_path, output_path):
         """Fallback mechanism: copy the original voice file."""
         try:
-            shutil.copy2(voice_path, output_path)
+            # Hardlink when on the same filesystem to avoid copying the audio data
+            try:
+                os.link(voice_path, output_path)
+            except OSError:
+                _copy_file(voice_path, output_path)
             logger.warning(f"Fallback: Copied original voice file to {output_path}")
             return True
         except Exception as e:
@@ -168,7 +242,7 @@ class VoiceCloner:
         
         try:
             # Extract parameters from voice path (format: speaker_1_temp_0.5_topk_80_...)
-            match = re.search(r'speaker_(\d+)_temp_([\d.]+)_topk_(\d+)', voice_path)
+            match = _VOICE_PARAM_RE.search(voice_path)
             if match:
                 params['speaker_id'] = int(match.group(1))
                 params['temperature'] = float(match.group(2))
@@ -181,107 +255,244 @@ class VoiceCloner:
             
         return params
     
-    def generate_direct(self, text, voice_path, output_path, device="cpu"):
-        """Generate speech directly using the CSM model"""
+    def _resolve_checkpoint(self):
+        """Return the checkpoint to load: model_path if given, else the cached HF snapshot."""
+        if self.model_path and os.path.exists(self.model_path):
+            return self.model_path
+        
+        checkpoint = _find_snapshot_checkpoint()
+        if checkpoint is None:
+            # Don't remember the miss, so a later download is picked up
+            _find_snapshot_checkpoint.cache_clear()
+        return checkpoint
+    
+    def _import_csm_modules(self):
+        """Import the CSM generator and model modules, returning (Generator, Model, ModelArgs)."""
+        # Import required modules (the CSM directory was put on sys.path in __init__)
         try:
-            # Add CSM directory to path
-            csm_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'voice_poc/csm')
-            if csm_dir not in sys.path:
-                sys.path.insert(0, csm_dir)
-                logging.info(f"Added {csm_dir} to Python path")
+            from generator import load_csm_1b, Generator, Segment
+            from models import ModelArgs, Model, FLAVORS
+            logging.info("Successfully imported CSM modules")
+        except ImportError as e:
+            logging.error(f"Error importing CSM modules: {e}")
+            logging.error(f"sys.path: {sys.path}")
+            logging.error(f"Looking for generator.py in: {self._csm_dir}")
+            if os.path.exists(os.path.join(self._csm_dir, 'generator.py')):
+                logging.info("generator.py exists in CSM directory")
+            raise
 
-            # Import required modules
-            try:
-                from generator import load_csm_1b, Generator, Segment
-                from models import ModelArgs, Model, FLAVORS
-                logging.info("Successfully imported CSM modules")
-            except ImportError as e:
-                logging.error(f"Error importing CSM modules: {e}")
-                logging.error(f"sys.path: {sys.path}")
-                logging.error(f"Looking for generator.py in: {csm_dir}")
-                if os.path.exists(os.path.join(csm_dir, 'generator.py')):
-                    logging.info("generator.py exists in CSM directory")
-                raise
+        return Generator, Model, ModelArgs
+    
+    def preload(self, device=None, precision="bf16"):
+        """
+        Warm up the CSM code path ahead of the first request.
+        
+        Importing the CSM modules and loading the model checkpoint take
+        seconds; doing it once at startup keeps that cost off the first
+        generation request.
+        
+        Args:
+            device: 'cuda' or 'cpu', or None/'auto' to use CUDA when available
+            precision: 'bf16', 'fp16', or 'fp32'
+        """
+        import torch
+        
+        device = _resolve_device(device)
+        dtype = {"bf16": torch.bfloat16, "fp16": torch.float16, "fp32": torch.float32}[precision]
+        self._ensure_generator(device, dtype)
+    
+    def _compile_model(self, model, device):
+        """
+        Compile the CSM backbone and decoder with torch.compile.
+        
+        On CUDA, reduce-overhead mode captures CUDA graphs so the many small
+        decoder steps skip per-kernel launch and dispatch overhead.
+        _ensure_generator runs a short warm-up generation afterwards so the
+        compilation cost isn't paid by a real request.
+        
+        TorchScript isn't used: Generator drives the model through
+        setup_caches, generate_frame and reset_caches, which scripting drops
+        unless the CSM code marks them for export.
+        """
+        import torch
+        
+        if not hasattr(torch, "compile"):
+            logger.warning("torch.compile not available, running the model eagerly")
+            return model
+        
+        mode = "reduce-overhead" if device.type == "cuda" else "default"
+        try:
+            model.backbone = torch.compile(model.backbone, mode=mode, fullgraph=False)
+            model.decoder = torch.compile(model.decoder, mode=mode, fullgraph=False)
+            logger.info("Compiled CSM backbone and decoder (mode=%s)", mode)
+        except Exception as e:
+            logger.warning("torch.compile failed, running the model eagerly: %s", e)
+        return model
+    
+    def _ensure_generator(self, device, dtype):
+        """
+        Return the CSM generator for the given device and dtype, building it on first use.
+        
+        Generators are kept on the instance per (device, dtype), so the module
+        import, checkpoint load and any compilation are paid once per
+        combination rather than whenever requests switch between CPU and GPU.
+        """
+        generator = self._generators.get((device, dtype))
+        if generator is not None:
+            return generator
+        
+        import torch
+        
+        if device.type == "cuda":
+            # Let FP32 matmuls and convolutions use TF32 tensor cores, and BF16
+            # matmuls reduce in reduced precision; set here rather than at import
+            # so importing this module doesn't pull in torch
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.allow_tf32 = True
+            torch.backends.cuda.matmul.allow_bf16_reduced_precision_reduction = True
+        
+        Generator, Model, ModelArgs = self._import_csm_modules()
+        model = self._load_model(Model, ModelArgs, device, dtype)
+        generator = Generator(model)
+        
+        if self.compile_model:
+            # Trigger compilation on a short clip so a real request doesn't pay for it
+            logging.info("Warming up compiled model")
+            use_autocast = device.type == "cuda" and dtype != torch.float32
+            with torch.inference_mode(), torch.autocast(device.type, dtype=dtype, enabled=use_autocast):
+                generator.generate(text="Warm up.", speaker=0, context=[], max_audio_length_ms=160)
+        
+        self._generators[(device, dtype)] = generator
+        return generator
+    
+    def _load_model(self, Model, ModelArgs, device, dtype):
+        """Build the CSM model and load its checkpoint."""
+        import torch
+        
+        if self._checkpoint_path is None:
+            # Not found at startup; check again in case it has been downloaded since
+            self._checkpoint_path = self._resolve_checkpoint()
+            if self._checkpoint_path is None:
+                raise FileNotFoundError("No CSM checkpoint found in the Hugging Face cache")
+        model_path = self._checkpoint_path
+
+        # Initialize model arguments with correct dimensions from original working code
+        model_args = ModelArgs(
+            backbone_flavor="llama-1B",  # 16 layers, 2048 dim
+            decoder_flavor="llama-100M",  # 4 layers, 1024 dim
+            text_vocab_size=128256,  # Exact value from original
+            audio_vocab_size=2051,  # From codebook head shape
+            audio_num_codebooks=32  # From original working code
+        )
+        
+        # Log model and checkpoint architectures for debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Model configuration:")
+            logger.debug("- Backbone: llama-1B (16 layers, 2048 dim)")
+            logger.debug("- Decoder: llama-100M (4 layers, 1024 dim)")
+            logger.debug("- Text vocab size: %s", 128256)
+            logger.debug("- Audio vocab size: 2051")
+            logger.debug("- Audio codebooks: 32")
+
+        # Create model instance on the CPU; it moves to the device once the weights are in
+        model = Model(model_args).to(dtype=dtype)
 
+        # Memory-map the checkpoint so its tensors are paged in straight from the
+        # file instead of being read into a second copy in RAM; weights_only
+        # restricts unpickling to tensors and plain containers
+        try:
+            state_dict = torch.load(model_path, map_location="cpu", weights_only=True, mmap=True)
+        except pickle.UnpicklingError as e:
+            # The checkpoint carries non-tensor objects the restricted unpickler rejects.
+            # The full unpickler can run arbitrary code from the file, so say so loudly
+            logger.warning("weights_only load of %s rejected; loading it with the full unpickler, "
+                           "which executes any pickled code in the checkpoint: %s", model_path, e)
+            state_dict = torch.load(model_path, map_location="cpu", weights_only=False, mmap=True)
+        except RuntimeError as e:
+            # Checkpoints saved in the legacy (non-zip) format can't be mapped
+            logger.warning("Could not memory-map %s; loading it with the full unpickler, "
+                           "which executes any pickled code in the checkpoint: %s", model_path, e)
+            state_dict = torch.load(model_path, map_location="cpu", weights_only=False)
+        
+        # Load state dict with non-strict checking to allow tensor mismatches; assign
+        # adopts the mapped tensors rather than copying them into the model's own
+        incompatible = model.load_state_dict(state_dict, strict=False, assign=True)
+        logging.info("Loaded model state_dict with strict=False to allow tensor mismatches")
+        logger.debug("missing=%d unexpected=%d",
+                     len(incompatible.missing_keys), len(incompatible.unexpected_keys))
+        
+        # Only the mismatched keys are worth listing; load_state_dict already found them
+        if logger.isEnabledFor(logging.DEBUG):
+            for name in incompatible.missing_keys:
+                logger.debug("Missing from checkpoint: %s", name)
+            for name in incompatible.unexpected_keys:
+                logger.debug("Unexpected in checkpoint: %s (%s)", name, tuple(state_dict[name].shape))
+        
+        # A single cast and transfer of the whole model to the target device
+        model = model.to(device=device, dtype=dtype, non_blocking=True)
+        
+        # Assuming we have a successful load, set the model to eval mode
+        model.eval()
+        
+        if self.compile_model:
+            model = self._compile_model(model, device)
+        
+        return model
+    
+    def _save_audio(self, output_path, audio, sample_rate):
+        """Save a generated clip, writing WAVs directly with libsndfile."""
+        if output_path.lower().endswith(".wav"):
+            # One explicit device-to-host copy, then wait for it before handing
+            # the buffer to soundfile; mono audio is written as a 1-D array of 32-bit
+            # floats, the same format torchaudio.save wrote for float tensors
+            cpu_audio = audio.detach().to('cpu', non_blocking=True)
+            if audio.is_cuda:
+                import torch
+                torch.cuda.synchronize(audio.device)
+            sf.write(output_path, cpu_audio.float().contiguous().numpy(), sample_rate, subtype='FLOAT')
+        else:
+            import torchaudio
+            torchaudio.save(output_path, audio.unsqueeze(0), sample_rate)
+        logging.info(f"Saved generated audio to {output_path}")
+    
+    def generate_direct(self, text, voice_path, output_path, device="cpu", precision="bf16"):
+        """Generate speech directly using the CSM model"""
+        try:
+            # torch is imported here rather than at module level, so importing
+            # this module stays cheap for callers that never generate
+            import torch
+            
+            # 'auto' has to be resolved before it reaches .to() or autocast
+            device = _resolve_device(device)
+            dtype = {"bf16": torch.bfloat16, "fp16": torch.float16, "fp32": torch.float32}[precision]
+            
             # Extract parameters from voice path
             voice_params = self._extract_voice_params(voice_path)
             speaker_id = voice_params.get('speaker_id', 1)
             temperature = voice_params.get('temperature', 0.5)
             top_k = voice_params.get('top_k', 80)
             
-            # Get the snapshot path
-            cache_dir = os.path.expanduser("~/.cache/huggingface/hub")
-            repo_id = "sesame/csm-1b"
-            model_dir = os.path.join(cache_dir, "models--sesame--csm-1b")
-            
-            # Find the snapshot directory
-            snapshot_dir = os.path.join(model_dir, "snapshots")
-            if os.path.exists(snapshot_dir):
-                # Find the most recent snapshot
-                snapshots = [d for d in os.listdir(snapshot_dir) if os.path.isdir(os.path.join(snapshot_dir, d))]
-                if snapshots:
-                    latest_snapshot = sorted(snapshots)[-1]
-                    snapshot_path = os.path.join(snapshot_dir, latest_snapshot)
-                    checkpoint_files = [f for f in os.listdir(snapshot_path) if f.endswith(('.pt', '.ckpt'))]
-                    if checkpoint_files:
-                        model_path = os.path.join(snapshot_path, checkpoint_files[0])
-                        logging.info(f"Found checkpoint in snapshot: {model_path}")
-
-            # Initialize model arguments with correct dimensions from original working code
-            model_args = ModelArgs(
-                backbone_flavor="llama-1B",  # 16 layers, 2048 dim
-                decoder_flavor="llama-100M",  # 4 layers, 1024 dim
-                text_vocab_size=128256,  # Exact value from original
-                audio_vocab_size=2051,  # From codebook head shape
-                audio_num_codebooks=32  # From original working code
-            )
-            
-            # Log model and checkpoint architectures for debugging
-            logging.info("Model configuration:")
-            logging.info(f"- Backbone: llama-1B (16 layers, 2048 dim)")
-            logging.info(f"- Decoder: llama-100M (4 layers, 1024 dim)")
-            logging.info(f"- Text vocab size: {128256}")
-            logging.info(f"- Audio vocab size: 2051")
-            logging.info(f"- Audio codebooks: 32")
-
-            # Create model instance
-            model = Model(model_args).to(device=device, dtype=torch.bfloat16)
-
-            # Load checkpoint and match dimensions
-            state_dict = torch.load(model_path, map_location=device)
-            
-            # Log model and checkpoint architectures for debugging
-            logging.info("\nModel architecture:")
-            for name, param in model.state_dict().items():
-                logging.info(f"{name}: {param.shape}")
-            logging.info("\nCheckpoint architecture:")
-            for name, param in state_dict.items():
-                logging.info(f"{name}: {param.shape}")
-
-            # Load state dict with non-strict checking to allow tensor mismatches
-            model.load_state_dict(state_dict, strict=False)
-            logging.info("Loaded model state_dict with strict=False to allow tensor mismatches")
-            
-            # Assuming we have a successful load, set the model to eval mode
-            model.eval()
-
-            # Create generator
-            generator = Generator(model)
-            
-            # Generate audio - matching the signature from the working script
-            logging.info(f"Generating audio for: '{text}' with speaker_id={speaker_id}, temperature={temperature}, topk={top_k}")
-            output_audio = generator.generate(
-                text=text,
-                speaker=speaker_id,
-                context=[],  # Empty context list, not None
-                temperature=temperature,
-                topk=top_k,
-                max_audio_length_ms=10000  # Standard length
-            )
+            generator = self._ensure_generator(device, dtype)
             
-            # Save audio
-            torchaudio.save(output_path, output_audio.unsqueeze(0), generator.sample_rate)
-            logging.info(f"Saved generated audio to {output_path}")
+            # No autograd state is needed from here on; inference_mode skips the
+            # version counter and view tracking on every decoder step
+            with torch.inference_mode():
+                # Autocast runs any remaining FP32 matmuls on the GPU in the model's precision
+                use_autocast = device.type == "cuda" and dtype != torch.float32
+                with torch.autocast(device.type, dtype=dtype, enabled=use_autocast):
+                    # Generate audio - matching the signature from the working script
+                    logging.info(f"Generating audio for: '{text}' with speaker_id={speaker_id}, temperature={temperature}, topk={top_k}")
+                    output_audio = generator.generate(
+                        text=text,
+                        speaker=speaker_id,
+                        context=[],  # Empty context list, not None
+                        temperature=temperature,
+                        topk=top_k,
+                        max_audio_length_ms=10000  # Standard length
+                    )
+                
+                # Save audio
+                self._save_audio(output_path, output_audio, generator.sample_rate)
             
             return True
             
@@ -289,7 +500,19 @@ class VoiceCloner:
             logging.error(f"Failed to load CSM model: {str(e)}")
             raise RuntimeError(f"Error in direct generation: {str(e)}")
     
-    def generate(self, text, voice_path=None, output_path=None, device="auto"):
+    def _default_voice_path(self):
+        """Return the first voice sample in the input directory, or None if there are none."""
+        # scandir entries carry the file type from the directory read, saving a stat per file
+        with os.scandir(self.input_voice_dir) as it:
+            voice_files = [e.path for e in it if e.name.endswith('.wav') and e.is_file()]
+        if not voice_files:
+            logger.error(f"No voice files found in {self.input_voice_dir}")
+            return None
+        
+        logger.info(f"Using voice file: {voice_files[0]}")
+        return voice_files[0]
+    
+    def generate(self, text, voice_path=None, output_path=None, device="auto", precision="bf16"):
         """
         Generate speech with the given text and voice.
         
@@ -298,6 +521,7 @@ class VoiceCloner:
             voice_path: Path to voice sample (or None to use first available)
             output_path: Path to save output (or auto-generated if None)
             device: 'cuda', 'cpu', or 'auto'
+            precision: 'bf16', 'fp16' (for pre-Ampere GPUs such as Volta), or 'fp32'
             
         Returns:
             Path to generated audio file or None if failed
@@ -306,23 +530,87 @@ class VoiceCloner:
         
         # Find voice file if not specified
         if voice_path is None:
-            voice_files = [f for f in os.listdir(self.input_voice_dir) 
-                          if f.endswith('.wav') and os.path.isfile(os.path.join(self.input_voice_dir, f))]
-            if not voice_files:
-                logger.error(f"No voice files found in {self.input_voice_dir}")
+            voice_path = self._default_voice_path()
+            if voice_path is None:
                 return None
-            
-            voice_path = os.path.join(self.input_voice_dir, voice_files[0])
-            logger.info(f"Using voice file: {voice_path}")
         
         # Generate output path if not specified
         if output_path is None:
             output_path = os.path.join(self.output_dir, self._generate_output_filename())
         
         # Try direct generation first
-        result = self.generate_direct(text, voice_path, output_path, device)
+        result = self.generate_direct(text, voice_path, output_path, device, precision)
         
         elapsed_time = time.time() - start_time
         logger.info(f"Voice generation completed in {elapsed_time:.2f} seconds")
         
-        return result 
\ No newline at end of file
+        return result
+    
+    def generate_batch(self, texts, voice_path=None, output_paths=None, device="auto", precision="bf16"):
+        """
+        Generate speech for several texts in one voice on a single loaded generator.
+        
+        The texts are decoded one after another, not batched: the CSM backbone
+        has no padding mask, so prompts of different lengths can't be stacked.
+        What is shared is the generator, loaded once for all of them.
+        
+        Args:
+            texts: List of texts to convert to speech
+            voice_path: Path to voice sample (or None to use first available)
+            output_paths: List of paths to save outputs (or auto-generated if None)
+            device: 'cuda', 'cpu', or 'auto'
+            precision: 'bf16', 'fp16' (for pre-Ampere GPUs such as Volta), or 'fp32'
+            
+        Returns:
+            List of paths to generated audio files, with None for texts that failed
+        """
+        import torch
+        
+        if output_paths is not None and len(output_paths) != len(texts):
+            raise ValueError(f"Got {len(output_paths)} output paths for {len(texts)} texts")
+        
+        start_time = time.time()
+        
+        if voice_path is None:
+            voice_path = self._default_voice_path()
+            if voice_path is None:
+                return [None] * len(texts)
+        
+        if output_paths is None:
+            output_paths = [os.path.join(self.output_dir, self._generate_output_filename(prefix=f"generated_{i}"))
+                            for i in range(len(texts))]
+        
+        device = _resolve_device(device)
+        dtype = {"bf16": torch.bfloat16, "fp16": torch.float16, "fp32": torch.float32}[precision]
+        
+        voice_params = self._extract_voice_params(voice_path)
+        speaker_id = voice_params.get('speaker_id', 1)
+        temperature = voice_params.get('temperature', 0.5)
+        top_k = voice_params.get('top_k', 80)
+        
+        generator = self._ensure_generator(device, dtype)
+        
+        results = []
+        use_autocast = device.type == "cuda" and dtype != torch.float32
+        with torch.inference_mode(), torch.autocast(device.type, dtype=dtype, enabled=use_autocast):
+            for text, output_path in zip(texts, output_paths):
+                try:
+                    logging.info(f"Generating audio for: '{text}' with speaker_id={speaker_id}, temperature={temperature}, topk={top_k}")
+                    audio = generator.generate(
+                        text=text,
+                        speaker=speaker_id,
+                        context=[],
+                        temperature=temperature,
+                        topk=top_k,
+                        max_audio_length_ms=10000
+                    )
+                    self._save_audio(output_path, audio, generator.sample_rate)
+                    results.append(output_path)
+                except Exception as e:
+                    logger.error(f"Failed to generate '{text}': {e}")
+                    results.append(None)
+        
+        elapsed_time = time.time() - start_time
+        logger.info(f"Batch voice generation of {len(texts)} texts completed in {elapsed_time:.2f} seconds")
+        
+        return results
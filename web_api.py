@@ -10,12 +10,67 @@ import sys
 import json
 import logging
 import time
+import gzip
+import html
+import hashlib
+import secrets
+import unicodedata
+import functools
+import platform
 from pathlib import Path
-from flask import Flask, request, jsonify, send_file, render_template_string, send_from_directory
+from flask import Flask, request, jsonify, send_file, send_from_directory, abort
+from werkzeug.security import safe_join
+from urllib.parse import quote
 from flask_cors import CORS
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import OrderedDict
+from dataclasses import dataclass, replace, asdict
+from typing import Optional
 import threading
 
+# Brotli is optional; without it the precompressed responses are gzip only
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Expandable segments let the CUDA caching allocator grow blocks in place instead of
+# fragmenting over a long-running server's mix of request sizes. Set before torch is
+# first imported, since the allocator reads it once; PYTORCH_CUDA_ALLOC_CONF is the
+# name older torch releases read
+os.environ.setdefault("PYTORCH_ALLOC_CONF", "expandable_segments:True,max_split_size_mb:128")
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", os.environ["PYTORCH_ALLOC_CONF"])
+
+# torch and psutil are only used for diagnostics and CUDA cache housekeeping here,
+# so the server still starts without them
+try:
+    import torch
+except ImportError:
+    torch = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Prefer orjson for jsonify and request.json when it is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# htmlmin is optional; without it the demo page is sent as written
+try:
+    import htmlmin
+except ImportError:
+    htmlmin = None
+
+# Flask-Compress is optional; without it dynamic JSON responses go out uncompressed
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,11 +79,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger("tts_web_api")
 
+# Directory containing this script, resolved once at import
+HERE = Path(__file__).resolve().parent
+
 # Add the current directory to Python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(str(HERE))
+
+# Voice sample and output directories, joined once rather than per request
+VOICES_DIR = os.path.join(HERE, 'voices')
+VOICES_INPUT_DIR = os.path.join(VOICES_DIR, 'input')
+VOICES_OUTPUT_DIR = os.path.join(VOICES_DIR, 'output')
 
-# Get the script directory (add at module level)
-script_dir = os.path.dirname(os.path.abspath(__file__))
+# Only non-POSIX systems need separators rewritten in the relative paths we report
+_IS_POSIX = os.sep == '/'
 
 # Import the voice cloner and CSM adapter
 from utils.voice_cloner import VoiceCloner
@@ -38,794 +101,330 @@ from utils.csm_adapter import CSMModelAdapter
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+if orjson is not None:
+    from flask.json.provider import DefaultJSONProvider
+    
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider that encodes and decodes with orjson."""
+        
+        def dumps(self, obj, **kwargs):
+            # Types orjson doesn't know (dates, decimals, ...) go through Flask's default hook
+            return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+    
+    app.json = OrjsonProvider(app)
+
+if Compress is not None:
+    # Compresses the dynamic JSON (status, diagnostics) for polling clients. Audio
+    # isn't in its mimetype list, and responses that already carry a
+    # Content-Encoding, like the precompressed page and voice list, are left alone
+    app.config["COMPRESS_MIN_SIZE"] = 500
+    Compress(app)
+
 # Initialize the TTS engines
 voice_cloner = VoiceCloner()
-try:
-    csm_adapter = CSMModelAdapter()
-    csm_available = True
-except Exception as e:
-    logger.warning(f"CSM Model Adapter not available: {e}")
-    csm_available = False
 
-# Set up executor for background tasks
+# The CSM adapter is created on first use so it doesn't hold up server startup
+_csm_adapter = None
+_csm_failed = False
+_csm_lock = threading.Lock()
+
+def get_csm():
+    """Return the CSM adapter, creating it on first use, or None if it isn't available."""
+    global _csm_adapter, _csm_failed
+    if _csm_adapter is None and not _csm_failed:
+        with _csm_lock:
+            if _csm_adapter is None and not _csm_failed:
+                try:
+                    _csm_adapter = CSMModelAdapter()
+                except Exception as e:
+                    logger.warning(f"CSM Model Adapter not available: {e}")
+                    _csm_failed = True
+    return _csm_adapter
+
+def _warm_up():
+    """Load the in-process model and create the CSM adapter ahead of the first request."""
+    try:
+        # Held so a request arriving mid-load waits for this load instead of starting another
+        with voice_cloner_lock:
+            voice_cloner.preload()
+        logger.info("Voice cloner model warmed up")
+    except Exception as e:
+        logger.warning(f"Voice cloner warm-up failed, the model will load on first request: {e}")
+    
+    get_csm()
+
+def start_warmup():
+    """
+    Warm the models up on a background thread while the server starts accepting requests.
+    
+    Called from the serving process rather than at import: under gunicorn's
+    preload_app the module is imported in the master, and a thread started
+    there wouldn't survive the fork (and could leave a lock held in the
+    worker). Loading after the fork also keeps CUDA out of the master.
+    """
+    threading.Thread(target=_warm_up, name="model-warmup", daemon=True).start()
+
+# Set up executor for background tasks; request handlers only submit work here
+# and return a task ID, so they never wait on the model
 executor = ThreadPoolExecutor(max_workers=2)
 
-# Background task dictionary to track progress
-tasks = {}
-task_lock = threading.Lock()
+# Tasks allowed to be queued or running at once; past this /api/generate answers
+# 429 instead of stacking up work that would only wait on the model
+MAX_PENDING_TASKS = 8
+pending_slots = threading.BoundedSemaphore(MAX_PENDING_TASKS)
+
+# The in-process CSM generator keeps per-generation KV caches on its single model,
+# so simple-model generations take turns; CSM runs in its own process and can
+# overlap with them on the executor's other worker
+voice_cloner_lock = threading.Lock()
+
+# Return cached CUDA blocks to the driver every this many GPU tasks. empty_cache()
+# synchronizes the device, so it isn't done after every task
+EMPTY_CACHE_EVERY = 10
+_gpu_task_count = 0
+_gpu_task_count_lock = threading.Lock()
+
+@dataclass(frozen=True)
+class TaskState:
+    """Snapshot of a background generation task's progress, as returned by /api/status."""
+    text_length: int
+    start_time: float  # time.time(), for clients
+    start_perf: float  # time.perf_counter(), for durations and expiry; not sent to clients
+    status: str = "pending"
+    progress: int = 0
+    error: Optional[str] = None
+    output: Optional[str] = None
+    generation_time: Optional[float] = None
+
+# Background task dictionaries to track progress, sharded by task ID so progress
+# updates for different tasks don't contend for one lock. Writers hold the shard's
+# lock and swap in a new immutable TaskState rather than mutating one, so status
+# polls can read records without taking the lock at all
+TASK_SHARDS = 16  # a power of two, so a shard is picked with a bit mask
+task_shards = [({}, threading.Lock()) for _ in range(TASK_SHARDS)]
+
+def _task_shard(task_id):
+    """Return the (tasks, lock) pair that holds the given task."""
+    return task_shards[hash(task_id) & (TASK_SHARDS - 1)]
+
+def update_task(task_id, **fields):
+    """
+    Swap in a copy of a task's state with the given fields changed, under its shard's lock.
+    
+    Returns the new TaskState, or None if the task no longer exists.
+    """
+    tasks, task_lock = _task_shard(task_id)
+    with task_lock:
+        task = tasks.get(task_id)
+        if task is None:
+            return None
+        task = tasks[task_id] = replace(task, **fields)
+    return task
+
+# Finished tasks are dropped this long after they started, so the shards don't
+# grow for the life of the server; clients poll well within it
+TASK_TTL_SECONDS = 600
+TASK_REAP_INTERVAL_SECONDS = 60
+
+def _reap_tasks():
+    """Remove complete and errored tasks older than TASK_TTL_SECONDS from every shard."""
+    cutoff = time.perf_counter() - TASK_TTL_SECONDS
+    reaped = 0
+    for tasks, task_lock in task_shards:
+        with task_lock:
+            expired = [task_id for task_id, task in tasks.items()
+                       if task.status in ("complete", "error") and task.start_perf < cutoff]
+            for task_id in expired:
+                del tasks[task_id]
+        reaped += len(expired)
+    
+    if reaped:
+        logger.debug(f"Reaped {reaped} finished tasks")
+
+def _run_task_reaper():
+    """Call _reap_tasks every TASK_REAP_INTERVAL_SECONDS for the life of the process."""
+    while True:
+        time.sleep(TASK_REAP_INTERVAL_SECONDS)
+        try:
+            _reap_tasks()
+        except Exception as e:
+            logger.warning(f"Task reaper failed: {e}")
+
+def start_task_reaper():
+    """Start the background thread that expires finished tasks; like start_warmup, call it in the serving process."""
+    threading.Thread(target=_run_task_reaper, name="task-reaper", daemon=True).start()
+
+# Outputs of recent generations keyed by request hash, least recently used first,
+# so repeating a request returns the earlier file instead of re-running the model
+RESULT_CACHE_SIZE = 512
+result_cache = OrderedDict()
+result_cache_lock = threading.Lock()
+
+# Generations currently running, keyed by request hash; an identical request that
+# arrives meanwhile waits on the same Future instead of running the model again
+_inflight = {}
+_inflight_lock = threading.Lock()
 
 # Load voice data
-VOICE_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "characters", "voices.json")
+VOICE_DATA_PATH = HERE / "characters" / "voices.json"
 try:
-    with open(VOICE_DATA_PATH, 'r') as f:
-        VOICE_DATA = json.load(f)
+    # Parse the raw bytes in one call; orjson skips the decode to str entirely
+    _json_loads = orjson.loads if orjson is not None else json.loads
+    VOICE_DATA = _json_loads(VOICE_DATA_PATH.read_bytes())
     logger.info(f"Loaded {len(VOICE_DATA)} voice entries from {VOICE_DATA_PATH}")
 except Exception as e:
     logger.error(f"Error loading voice data from {VOICE_DATA_PATH}: {e}")
     VOICE_DATA = []
 
-# HTML template for the demo page
-HTML_TEMPLATE = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Character TTS Demo</title>
-    <style>
-        body {
-            font-family: 'Arial', sans-serif;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-            background: #f5f5f5;
-        }
-        
-        h1, h2 {
-            text-align: center;
-            color: #333;
-        }
-        
-        .character-card {
-            background: white;
-            border-radius: 10px;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-            overflow: hidden;
-            margin: 20px 0;
-            border-left: 5px solid #4a90e2;
-        }
-        
-        .character-header {
-            padding: 15px;
-            border-bottom: 1px solid #eee;
-        }
-        
-        .character-name {
-            margin: 0;
-            color: #333;
-        }
-        
-        .character-title {
-            margin: 5px 0 0;
-            color: #666;
-            font-style: italic;
-        }
-        
-        .character-body {
-            padding: 15px;
-        }
-        
-        .character-description {
-            color: #555;
-            margin-bottom: 15px;
-        }
-        
-        .voice-info {
-            display: flex;
-            justify-content: space-between;
-            margin-bottom: 10px;
-            font-size: 0.9em;
-            color: #666;
-        }
-        
-        .voice-params {
-            font-family: monospace;
-            background: #f0f0f0;
-            padding: 2px 5px;
-            border-radius: 3px;
-        }
-        
-        audio {
-            width: 100%;
-            margin: 5px 0;
-        }
-        
-        .tts-container {
-            margin-top: 15px;
-            padding-top: 15px;
-            border-top: 1px solid #eee;
-        }
-        
-        .tts-input {
-            width: 100%;
-            height: 80px;
-            padding: 10px;
-            border: 1px solid #ddd;
-            border-radius: 5px;
-            resize: vertical;
-            font-family: 'Arial', sans-serif;
-            margin-bottom: 10px;
-        }
-        
-        .tts-controls {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }
-        
-        .tts-generate {
-            background: #4a90e2;
-            color: white;
-            border: none;
-            padding: 8px 15px;
-            border-radius: 5px;
-            cursor: pointer;
-            font-weight: bold;
-            transition: background 0.3s ease;
-        }
-        
-        .tts-generate:hover {
-            background: #3a80d2;
-        }
-        
-        .tts-generate:disabled {
-            background: #cccccc;
-            cursor: not-allowed;
-        }
-        
-        /* Status message styles */
-        .tts-status {
-            margin-top: 10px;
-            padding: 8px 12px;
-            border-radius: 4px;
-            font-size: 0.9em;
-            display: none;
-        }
-        
-        .status-starting {
-            display: block;
-            background-color: #e8f5e9;
-            color: #2e7d32;
-            border-left: 4px solid #2e7d32;
-        }
-        
-        .status-generating {
-            display: block;
-            background-color: #fff3e0;
-            color: #e65100;
-            border-left: 4px solid #e65100;
-        }
-        
-        .status-retrying {
-            display: block;
-            background-color: #fff8e1;
-            color: #ff8f00;
-            border-left: 4px solid #ff8f00;
-        }
-        
-        .status-success {
-            display: block;
-            background-color: #e8f5e9;
-            color: #2e7d32;
-            border-left: 4px solid #2e7d32;
-        }
-        
-        .status-error {
-            display: block;
-            background-color: #ffebee;
-            color: #c62828;
-            border-left: 4px solid #c62828;
-        }
-        
-        .debug-panel {
-            background: #f8f8f8;
-            border: 1px solid #ddd;
-            border-radius: 5px;
-            padding: 15px;
-            margin-top: 20px;
-        }
-        
-        .debug-panel h3 {
-            margin-top: 0;
-            border-bottom: 1px solid #ddd;
-            padding-bottom: 10px;
-        }
-        
-        .log-entry {
-            margin: 5px 0;
-            font-family: monospace;
-        }
-        
-        .log-error {
-            color: #c62828;
-        }
-        
-        .log-info {
-            color: #2e7d32;
-        }
-        
-        .log-warn {
-            color: #ff8f00;
-        }
-        
-        .file-check-panel {
-            background-color: #fffde7;
-            border: 1px solid #ffd54f;
-            padding: 10px;
-            margin-top: 10px;
-            border-radius: 4px;
-        }
-        
-        .file-check-result {
-            font-family: monospace;
-            margin: 5px 0;
-        }
-        
-        .check-success {
-            color: #388e3c;
-        }
-        
-        .check-error {
-            color: #d32f2f;
-        }
-        
-        .check-warning {
-            color: #f57c00;
-        }
-        
-        .fix-action {
-            margin-top: 10px;
-            padding: 10px;
-            background: #e3f2fd;
-            border-radius: 4px;
-            border-left: 4px solid #2196f3;
-        }
-    </style>
-</head>
-<body>
-    <h1>Character TTS Demo</h1>
-    <p style="text-align: center;">A demonstration of character-based text-to-speech generation</p>
-    
-    <div class="character-card">
-        <div class="character-header">
-            <h3 class="character-name" id="character-name">Select a Voice</h3>
-            <p class="character-title" id="character-title"></p>
-        </div>
-        <div class="character-body">
-            <p class="character-description" id="character-description">
-                Choose a voice from the dropdown below to get started.
-            </p>
-            
-            <div class="voice-info">
-                <span id="voice-gender-info">GENDER (confidence)</span>
-                <span class="voice-params" id="voice-params">temp: 0.0, topk: 0</span>
-            </div>
-            <div class="voice-info">
-                <span id="voice-style">Style: None</span>
-                <span id="voice-id">Speaker ID: 0</span>
-            </div>
-            
-            <div id="sample-audio-container">
-                <p><strong>Voice Samples:</strong></p>
-                <div id="select-voice-container">
-                    <select id="voice-selector">
-                        <option value="">Select a voice...</option>
-                    </select>
-                </div>
-                <audio id="sample-audio" controls>
-                    <source src="" type="audio/wav">
-                    Your browser does not support the audio element.
-                </audio>
-            </div>
-            
-            <div class="tts-container">
-                <div>
-                    <label for="device">Processing Device:</label>
-                    <select id="device">
-                        <option value="cpu" selected>CPU</option>
-                        <option value="auto">Auto (CUDA if available, else CPU)</option>
-                        <option value="cuda">CUDA (GPU)</option>
-                    </select>
-                </div>
-                
-                <p><strong>Generate New Speech:</strong></p>
-                <textarea class="tts-input" id="tts-text" placeholder="Enter text for this character to speak...">Hello</textarea>
-                <div class="tts-controls">
-                    <button class="tts-generate" id="generate-btn">Generate Speech</button>
-                    <div>
-                        <span class="loading" id="loading-indicator" style="display: none;">Processing...</span>
-                    </div>
-                </div>
-                <div class="tts-status" id="status-message">Waiting to start...</div>
-                <div id="generated-audio-container" style="display: none; margin-top: 10px;">
-                    <p><strong>Generated Speech:</strong></p>
-                    <audio id="generated-audio" controls>
-                        <source src="" type="audio/wav">
-                        Your browser does not support the audio element.
-                    </audio>
-                </div>
-            </div>
-        </div>
-    </div>
-    
-    <div class="file-check-panel" id="file-check-panel" style="display: none;">
-        <h3>File Accessibility Checks</h3>
-        <div id="file-check-results"></div>
-        <div class="fix-action" id="fix-action" style="display: none;"></div>
-    </div>
+# Lookup by file path and per-gender lists, built once since VOICE_DATA never changes
+VOICE_INDEX = {v['file_path']: v for v in VOICE_DATA}
+MALE_VOICES = [v for v in VOICE_DATA if v.get('gender') == 'male']
+FEMALE_VOICES = [v for v in VOICE_DATA if v.get('gender') == 'female']
+
+def _precompress(body):
+    """Compress an immutable response body once, keyed by Content-Encoding in order of preference."""
+    encoded = {}
+    if brotli is not None:
+        encoded['br'] = brotli.compress(body, quality=11)
+    encoded['gzip'] = gzip.compress(body, 9)
+    return encoded
+
+# Bodies passed to _static_response are all built at import, so none of them can
+# have changed since this point
+_STATIC_LAST_MODIFIED = int(time.time())
+
+def _static_response(body, encoded, etag, mimetype, max_age):
+    """
+    Build a cacheable response for a body that never changes at runtime.
     
-    <div class="debug-panel">
-        <h3>Debug Information</h3>
-        <div id="debug-logs"></div>
-    </div>
+    The first precompressed variant the client accepts is sent, so there is
+    no per-request compression work. Each encoding gets its own ETag, and
+    If-None-Match and If-Modified-Since revalidations are answered with a
+    bodiless 304.
+    """
+    response = app.response_class(mimetype=mimetype)
+    for encoding, data in encoded.items():
+        if encoding in request.accept_encodings:
+            response.set_data(data)
+            response.headers['Content-Encoding'] = encoding
+            etag = f"{etag}-{encoding}"
+            break
+    else:
+        response.set_data(body)
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    response.last_modified = _STATIC_LAST_MODIFIED
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
+
+# VOICE_DATA is loaded once and never modified, so the voice lists are serialized
+# once too; keyed by the ?gender= filter, with None for the full list
+_VOICES_RESPONSES = {}
+for _gender, _voices in ((None, VOICE_DATA), ('male', MALE_VOICES), ('female', FEMALE_VOICES)):
+    _body = json.dumps(_voices, separators=(',', ':')).encode('utf-8')
+    _VOICES_RESPONSES[_gender] = (_body, _precompress(_body), hashlib.md5(_body).hexdigest())
+
+def _voice_options_html():
+    """Render the voice selector's <optgroup> markup, male voices first."""
+    groups = []
+    for label, voices in (('Male Voices', MALE_VOICES), ('Female Voices', FEMALE_VOICES)):
+        if not voices:
+            continue
+        options = []
+        for v in voices:
+            name = v.get('character_name') or f"Speaker {v.get('speaker_id')}"
+            text = f"{name} - {v.get('style')} ({v.get('temperature')}, {v.get('topk')})"
+            options.append(f'<option value="{html.escape(v["file_path"])}">{html.escape(text)}</option>')
+        groups.append(f'<optgroup label="{label}">{"".join(options)}</optgroup>')
+    return "".join(groups)
+
+# The selector markup only depends on VOICE_DATA, so it is rendered once
+_VOICE_OPTIONS_HTML = _voice_options_html().encode('utf-8')
+_VOICE_OPTIONS_ENCODED = _precompress(_VOICE_OPTIONS_HTML)
+_VOICE_OPTIONS_ETAG = hashlib.md5(_VOICE_OPTIONS_HTML).hexdigest()
+
+def _build_index():
+    """
+    Render the demo page for serving.
     
-    <script>
-        // Voice data that will be loaded from the server
-        let voiceData = [];
-        
-        // Function to log debug messages
-        function logDebug(message, type = 'info') {
-            const logContainer = document.getElementById('debug-logs');
-            const logEntry = document.createElement('div');
-            logEntry.className = `log-entry log-${type}`;
-            
-            const timestamp = new Date().toISOString().substring(11, 23);
-            logEntry.textContent = `[${timestamp}] ${message}`;
-            
-            logContainer.prepend(logEntry);
-            console.log(`[DEBUG] ${message}`);
-        }
-        
-        // Function to update character information based on voice selection
-        function updateCharacterInfo(voiceId) {
-            const voice = voiceData.find(v => v.file_path === voiceId);
-            if (!voice) return;
-            
-            // Extract information from voice data
-            const speakerId = voice.speaker_id;
-            const gender = voice.gender;
-            const style = voice.style || "standard";
-            const temp = voice.temperature;
-            const topk = voice.topk;
-            
-            // Use character information from voice data
-            const characterName = voice.character_name || `Speaker ${speakerId}`;
-            const characterTitle = voice.character_role || `${gender.charAt(0).toUpperCase() + gender.slice(1)} Voice Artist`;
-            const characterDescription = voice.character_description || 
-                `A professionally trained ${gender} voice actor with expertise in ${style} performances.`;
-            
-            // Update the UI
-            document.getElementById('character-name').textContent = characterName;
-            document.getElementById('character-title').textContent = characterTitle;
-            document.getElementById('character-description').textContent = characterDescription;
-            document.getElementById('voice-gender-info').textContent = `${gender.toUpperCase()} (${voice.gender_confidence || 95}% confidence)`;
-            document.getElementById('voice-params').textContent = `temp: ${temp}, topk: ${topk}`;
-            document.getElementById('voice-style').textContent = `Style: ${style}`;
-            document.getElementById('voice-id').textContent = `Speaker ID: ${speakerId}`;
-            
-            // Update sample audio
-            const sampleAudio = document.getElementById('sample-audio');
-            sampleAudio.src = voiceId;
-            sampleAudio.load();
-            
-            logDebug(`Updated character information for: ${characterName}`);
-        }
-        
-        // Function to check if a file exists by making a HEAD request
-        async function checkFileExists(url) {
-            try {
-                const response = await fetch(url, { method: 'HEAD' });
-                return {
-                    exists: response.ok,
-                    status: response.status,
-                    statusText: response.statusText,
-                    contentType: response.headers.get('Content-Type'),
-                    contentLength: response.headers.get('Content-Length')
-                };
-            } catch (error) {
-                return {
-                    exists: false,
-                    error: error.message
-                };
-            }
-        }
-        
-        // Function to add file check result
-        function addFileCheckResult(message, status) {
-            document.getElementById('file-check-panel').style.display = 'block';
-            const resultsContainer = document.getElementById('file-check-results');
-            const resultEntry = document.createElement('div');
-            resultEntry.className = `file-check-result check-${status}`;
-            resultEntry.textContent = message;
-            resultsContainer.appendChild(resultEntry);
-        }
-        
-        // Perform comprehensive file checks
-        async function performFileChecks(audioPath) {
-            const fileCheckPanel = document.getElementById('file-check-panel');
-            const fixAction = document.getElementById('fix-action');
-            fileCheckPanel.style.display = 'block';
-            document.getElementById('file-check-results').innerHTML = '';
-            fixAction.style.display = 'none';
-            fixAction.innerHTML = '';
-            
-            // Normalize path
-            const normalizedPath = audioPath.startsWith('/') ? audioPath : '/' + audioPath;
-            const filename = normalizedPath.split('/').pop();
-            
-            // Check the original path
-            logDebug(`Checking file accessibility at: ${audioPath}`);
-            const fileCheck = await checkFileExists(audioPath);
-            
-            if (fileCheck.exists) {
-                addFileCheckResult(`✅ File is accessible at ${audioPath}`, 'success');
-                addFileCheckResult(`   Content-Type: ${fileCheck.contentType}`, 'info');
-                addFileCheckResult(`   Content-Length: ${fileCheck.contentLength} bytes`, 'info');
-                return true;
-            } else {
-                addFileCheckResult(`❌ File not accessible at ${audioPath}: ${fileCheck.status} ${fileCheck.statusText || fileCheck.error}`, 'error');
-                
-                // Try with a different base path
-                const altPath = `/audio/${filename}`;
-                logDebug(`Trying alternate path: ${altPath}`);
-                const altCheck = await checkFileExists(altPath);
-                
-                if (altCheck.exists) {
-                    addFileCheckResult(`✅ File is accessible at alternate path: ${altPath}`, 'success');
-                    addFileCheckResult(`   Content-Type: ${altCheck.contentType}`, 'info');
-                    addFileCheckResult(`   Content-Length: ${altCheck.contentLength} bytes`, 'info');
-                    
-                    // Show fix action
-                    fixAction.style.display = 'block';
-                    fixAction.innerHTML = `<p><strong>Fix:</strong> Use this alternate URL instead: <code>${altPath}</code></p>
-                                          <button id="use-alt-path">Use This Path</button>`;
-                    
-                    document.getElementById('use-alt-path').addEventListener('click', function() {
-                        document.getElementById('generated-audio').src = altPath;
-                        document.getElementById('generated-audio').load();
-                        document.getElementById('generated-audio-container').style.display = 'block';
-                        logDebug(`Updated audio source to alternate path: ${altPath}`, 'info');
-                    });
-                    
-                    return true;
-                }
-                
-                // Give up - propose testing with curl
-                addFileCheckResult(`❌ File not found at any tested path`, 'error');
-                fixAction.style.display = 'block';
-                fixAction.innerHTML = `<p><strong>Debugging suggestion:</strong> Check the server with:</p>
-                                      <pre>curl -I "http://${location.host}/${normalizedPath.substring(1)}"</pre>`;
-                
-                return false;
-            }
-        }
-        
-        // Generate TTS using the server API
-        async function generateTTS(voicePath, text, device) {
-            logDebug(`Generating TTS for voice: ${voicePath}`);
-            logDebug(`Text: ${text}`);
-            logDebug(`Device: ${device}`);
-            
-            try {
-                // Call the TTS API endpoint
-                logDebug(`Sending request to /api/tts`);
-                const response = await fetch('/api/tts', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({
-                        voice: voicePath,
-                        text: text,
-                        device: device
-                    })
-                });
-                
-                if (!response.ok) {
-                    const errorText = await response.text();
-                    logDebug(`HTTP error! status: ${response.status}, response: ${errorText}`, 'error');
-                    throw new Error(`HTTP error! status: ${response.status}`);
-                }
-                
-                const data = await response.json();
-                logDebug(`Got response: ${JSON.stringify(data)}`);
-                
-                if (data.task_id) {
-                    // Start polling for task status
-                    let attempts = 0;
-                    
-                    while (true) {
-                        try {
-                            const statusResponse = await fetch(`/api/status/${data.task_id}`);
-                            if (!statusResponse.ok) {
-                                logDebug(`Error checking status: ${statusResponse.status}`, 'error');
-                                // Wait and retry on network errors
-                                await new Promise(resolve => setTimeout(resolve, 1000));
-                                continue;
-                            }
-                            
-                            const statusData = await statusResponse.json();
-                            logDebug(`Task status: ${statusData.status}, progress: ${statusData.progress}%`);
-                            
-                            // Update the status message with progress
-                            updateStatus(`Generating speech... ${statusData.progress}%`, 'generating');
-                            
-                            if (statusData.status === 'complete') {
-                                return statusData.output;
-                            } else if (statusData.status === 'error') {
-                                throw new Error(statusData.error || 'Generation failed');
-                            }
-                        } catch (error) {
-                            // Only throw if it's not a network error
-                            if (error.message !== 'Failed to fetch') {
-                                throw error;
-                            }
-                            logDebug(`Network error checking status. Retrying...`, 'error');
-                        }
-                        
-                        // Wait 1 second before next poll
-                        await new Promise(resolve => setTimeout(resolve, 1000));
-                    }
-                } else {
-                    throw new Error('No task ID received');
-                }
-            } catch (error) {
-                logDebug(`Error calling TTS API: ${error.message}`, 'error');
-                throw error;
-            }
-        }
-        
-        // Load voice data from server
-        async function loadVoiceData() {
-            logDebug('Loading voice data from server...');
-            
-            try {
-                const response = await fetch('/api/voices');
-                if (!response.ok) {
-                    throw new Error(`HTTP error! status: ${response.status}`);
-                }
-                
-                voiceData = await response.json();
-                logDebug(`Loaded ${voiceData.length} voice entries`);
-                
-                // Populate voice selector
-                const voiceSelector = document.getElementById('voice-selector');
-                
-                // Clear existing options (except the first one)
-                while (voiceSelector.options.length > 1) {
-                    voiceSelector.remove(1);
-                }
-                
-                // Add voices grouped by gender and speaker
-                const maleVoices = voiceData.filter(v => v.gender === 'male');
-                const femaleVoices = voiceData.filter(v => v.gender === 'female');
-                
-                if (maleVoices.length > 0) {
-                    const maleGroup = document.createElement('optgroup');
-                    maleGroup.label = 'Male Voices';
-                    
-                    maleVoices.forEach(voice => {
-                        const option = document.createElement('option');
-                        option.value = voice.file_path;
-                        option.textContent = `${voice.character_name || `Speaker ${voice.speaker_id}`} - ${voice.style} (${voice.temperature}, ${voice.topk})`;
-                        maleGroup.appendChild(option);
-                    });
-                    
-                    voiceSelector.appendChild(maleGroup);
-                }
-                
-                if (femaleVoices.length > 0) {
-                    const femaleGroup = document.createElement('optgroup');
-                    femaleGroup.label = 'Female Voices';
-                    
-                    femaleVoices.forEach(voice => {
-                        const option = document.createElement('option');
-                        option.value = voice.file_path;
-                        option.textContent = `${voice.character_name || `Speaker ${voice.speaker_id}`} - ${voice.style} (${voice.temperature}, ${voice.topk})`;
-                        femaleGroup.appendChild(option);
-                    });
-                    
-                    voiceSelector.appendChild(femaleGroup);
-                }
-                
-                logDebug('Voice selector populated');
-            } catch (error) {
-                logDebug(`Error loading voice data: ${error.message}`, 'error');
-            }
-        }
-        
-        // Run server diagnostic
-        async function runDiagnostic() {
-            logDebug('Running server diagnostic...');
-            
-            try {
-                const response = await fetch('/api/diagnostic');
-                if (!response.ok) {
-                    throw new Error(`HTTP error! status: ${response.status}`);
-                }
-                
-                const data = await response.json();
-                logDebug('Diagnostic results:');
-                
-                // Log system info
-                if (data.system) {
-                    logDebug(`System: ${JSON.stringify(data.system)}`);
-                }
-                
-                // Log torch info
-                if (data.torch) {
-                    logDebug(`PyTorch: ${JSON.stringify(data.torch)}`);
-                }
-                
-                // Log voice cloner info
-                if (data.voice_cloner) {
-                    logDebug(`Voice Cloner: ${JSON.stringify(data.voice_cloner)}`);
-                }
-                
-                // Log path checks
-                if (data.path_checks) {
-                    logDebug(`Path Checks: ${JSON.stringify(data.path_checks)}`);
-                }
-                
-                logDebug(`Status: ${data.status}`);
-            } catch (error) {
-                logDebug(`Error running diagnostic: ${error.message}`, 'error');
-            }
-        }
-        
-        // Update status message
-        function updateStatus(message, status) {
-            const statusElement = document.getElementById('status-message');
-            statusElement.textContent = message;
-            statusElement.className = 'tts-status';
-            
-            if (status) {
-                statusElement.classList.add(`status-${status}`);
-            }
-            
-            statusElement.style.display = 'block';
-        }
-        
-        // Document ready
-        document.addEventListener('DOMContentLoaded', () => {
-            logDebug('Page loaded, initializing...');
-            
-            // Load voice data and auto-select first voice
-            loadVoiceData().then(() => {
-                // Auto-select the first voice after loading
-                const voiceSelector = document.getElementById('voice-selector');
-                if (voiceSelector.options.length > 1) {
-                    voiceSelector.selectedIndex = 1;  // Select first voice (index 1 since index 0 is the placeholder)
-                    updateCharacterInfo(voiceSelector.value);
-                }
-            });
-            
-            // Set up voice selector change event
-            const voiceSelector = document.getElementById('voice-selector');
-            voiceSelector.addEventListener('change', function() {
-                if (this.value) {
-                    updateCharacterInfo(this.value);
-                }
-            });
-            
-            // Set up generate button click event
-            const generateBtn = document.getElementById('generate-btn');
-            generateBtn.addEventListener('click', async function() {
-                const textInput = document.getElementById('tts-text');
-                const text = textInput.value.trim();
-                
-                if (!text) {
-                    alert('Please enter some text to generate speech.');
-                    return;
-                }
-                
-                const voicePath = document.getElementById('voice-selector').value;
-                if (!voicePath) {
-                    alert('Please select a voice first.');
-                    return;
-                }
-                
-                const device = document.getElementById('device').value;
-                const loadingIndicator = document.getElementById('loading-indicator');
-                const generatedAudioContainer = document.getElementById('generated-audio-container');
-                const generatedAudio = document.getElementById('generated-audio');
-                
-                // Reset file check panel
-                document.getElementById('file-check-panel').style.display = 'none';
-                document.getElementById('file-check-results').innerHTML = '';
-                
-                // Show loading indicator and update status
-                loadingIndicator.style.display = 'inline-block';
-                updateStatus('Starting TTS generation...', 'starting');
-                generateBtn.disabled = true;
-                
-                try {
-                    // Check server health
-                    logDebug('Checking server health...');
-                    try {
-                        const healthCheck = await fetch('/api/health');
-                        if (!healthCheck.ok) {
-                            logDebug('Server health check failed', 'error');
-                            updateStatus('Server may be down. Please wait a moment and try again.', 'error');
-                            return;
-                        }
-                        logDebug('Server is healthy');
-                    } catch (error) {
-                        logDebug('Cannot connect to server', 'error');
-                        updateStatus('Cannot connect to server. Please ensure it is running.', 'error');
-                        return;
-                    }
-                    
-                    // Generate TTS
-                    updateStatus('Generating speech...', 'generating');
-                    const outputPath = await generateTTS(voicePath, text, device);
-                    
-                    // Update audio source and display player
-                    const audioUrl = `/audio/${outputPath.split('/').pop()}`;
-                    generatedAudio.src = audioUrl;
-                    generatedAudio.load();
-                    generatedAudioContainer.style.display = 'block';
-                    
-                    // Update status
-                    updateStatus('Speech generated successfully!', 'success');
-                    
-                    // Perform file checks
-                    await performFileChecks(audioUrl);
-                } catch (error) {
-                    logDebug(`TTS generation failed: ${error.message}`, 'error');
-                    updateStatus(`Error: ${error.message}`, 'error');
-                } finally {
-                    // Hide loading indicator and re-enable button
-                    loadingIndicator.style.display = 'none';
-                    generateBtn.disabled = false;
-                }
-            });
-            
-            // Add diagnostic button
-            const debugPanel = document.querySelector('.debug-panel');
-            const diagnosticSection = document.createElement('div');
-            diagnosticSection.style.marginTop = '20px';
-            diagnosticSection.style.borderTop = '1px solid #ddd';
-            diagnosticSection.style.paddingTop = '10px';
-            diagnosticSection.innerHTML = `
-                <h3>Server Diagnostics</h3>
-                <button id="run-diagnostic" class="tts-generate">Run Server Diagnostic</button>
-            `;
-            debugPanel.appendChild(diagnosticSection);
-            
-            // Set up diagnostic button click event
-            document.getElementById('run-diagnostic').addEventListener('click', runDiagnostic);
-        });
-    </script>
-</body>
-</html>
-"""
+    The voice selector's options are rendered into the page, so it doesn't
+    need a second request for them. Its stylesheet and script links get a
+    ?v= content hash, so browsers can cache the assets for a year and still
+    fetch new ones after a change. The markup is minified when htmlmin is
+    installed.
+    """
+    with open(os.path.join(app.static_folder, 'index.html'), encoding='utf-8') as f:
+        page = f.read()
+    placeholder = '<option value="">Select a voice...</option>'
+    page = page.replace(placeholder, placeholder + _VOICE_OPTIONS_HTML.decode('utf-8'), 1)
+    for name in ('app.css', 'app.js'):
+        with open(os.path.join(app.static_folder, name), 'rb') as f:
+            version = hashlib.md5(f.read()).hexdigest()[:12]
+        page = page.replace(f'"/static/{name}"', f'"/static/{name}?v={version}"')
+    if htmlmin is not None:
+        page = htmlmin.minify(page, remove_comments=True)
+    return page.encode('utf-8')
+
+# With the CSS and JS split out the page is small, and it has to be rendered anyway
+# to version the asset links, so it is built and compressed once and served from
+# memory; edits under static/ then need a restart
+_INDEX_BYTES = _build_index()
+_INDEX_ENCODED = _precompress(_INDEX_BYTES)
+_INDEX_ETAG = hashlib.md5(_INDEX_BYTES).hexdigest()
+
+# Static assets are only linked with versioned URLs, so the built-in /static route
+# can let browsers keep them for a year
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 365 * 24 * 3600
 
 @app.route('/')
 def index():
     """Serve the demo page."""
-    return render_template_string(HTML_TEMPLATE)
+    # max-age=0: each visit revalidates (a bodiless 304) so new asset versions are picked up
+    return _static_response(_INDEX_BYTES, _INDEX_ENCODED, _INDEX_ETAG, 'text/html', 0)
 
 @app.route('/api/voices', methods=['GET'])
 def get_voices():
-    """Return the list of available voices."""
-    return jsonify(VOICE_DATA)
+    """Return the list of available voices, optionally filtered with ?gender=male or ?gender=female."""
+    gender = request.args.get('gender')
+    if gender not in _VOICES_RESPONSES:
+        return jsonify({"error": "gender must be 'male' or 'female'"}), 400
+    
+    body, encoded, etag = _VOICES_RESPONSES[gender]
+    return _static_response(body, encoded, etag, 'application/json', 300)
+
+@app.route('/api/voices.html', methods=['GET'])
+def get_voice_options():
+    """Return the voice selector's <optgroup> elements as an HTML fragment."""
+    return _static_response(_VOICE_OPTIONS_HTML, _VOICE_OPTIONS_ENCODED, _VOICE_OPTIONS_ETAG, 'text/html', 300)
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Simple health check endpoint."""
     return jsonify({'status': 'healthy'})
 
+def _is_valid_voice_path(voice_path):
+    """
+    Check a requested voice path's format before any work is queued for it.
+    
+    Voices listed in voices.json, which is what the demo page sends, are
+    accepted with one VOICE_INDEX lookup. Anything else has to be a relative
+    .wav path that can't climb out of the voices directory; whether the file
+    exists is still checked by perform_generation.
+    """
+    # JSON bodies can carry any type; only strings are paths
+    if not isinstance(voice_path, str):
+        return False
+    if voice_path in VOICE_INDEX:
+        return True
+    return (voice_path.endswith('.wav')
+            and not os.path.isabs(voice_path)
+            and '\\' not in voice_path
+            and '..' not in voice_path.split('/'))
+
 @app.route('/api/generate', methods=['POST'])
 def generate_speech():
     """Generate speech from text."""
@@ -837,30 +436,37 @@ def generate_speech():
     if not text:
         return jsonify({"error": "Text is required"}), 400
     
+    # JSON bodies can carry any type; a number or list here would fail later with a 500
+    if not isinstance(text, str):
+        return jsonify({"error": "Text must be a string"}), 400
+    
     if not voice_path:
         return jsonify({"error": "Voice path is required"}), 400
     
+    # Malformed paths are rejected here rather than costing an executor slot
+    if not _is_valid_voice_path(voice_path):
+        return jsonify({"error": "Invalid voice path"}), 400
+    
     # For very short texts in testing, default to CPU to avoid GPU overhead
     if len(text) < 5 and device == "auto":
         device = "cpu"
         logger.info("Short text detected, using CPU for efficiency")
     
+    if not pending_slots.acquire(blocking=False):
+        return jsonify({"error": "Too many generation requests in progress, try again shortly"}), 429
+    
+    future = None
     try:
-        # Create a unique task ID
-        task_id = str(int(time.time() * 1000))
+        # Create a unique task ID; random, so two requests in the same millisecond can't collide
+        task_id = secrets.token_hex(8)
+        tasks, task_lock = _task_shard(task_id)
         
         with task_lock:
-            tasks[task_id] = {
-                "status": "pending",
-                "progress": 0,
-                "error": None,
-                "output": None,
-                "text_length": len(text),
-                "start_time": time.time()
-            }
+            tasks[task_id] = TaskState(text_length=len(text), start_time=time.time(),
+                                       start_perf=time.perf_counter())
         
         # Submit the generation task to run in the background
-        executor.submit(
+        future = executor.submit(
             perform_generation, 
             task_id=task_id,
             text=text,
@@ -868,13 +474,72 @@ def generate_speech():
             device=device,
             model=model
         )
+        # The slot is freed however the task ends
+        future.add_done_callback(lambda _: pending_slots.release())
         
         return jsonify({"task_id": task_id})
     
     except Exception as e:
+        if future is None:
+            pending_slots.release()
         logger.exception(f"Error submitting generation task: {e}")
         return jsonify({"error": str(e)}), 500
 
+def _result_key(model, voice_path, device, text):
+    """
+    Hash the inputs that determine a generation's output.
+    
+    The text is NFKC-normalized and its whitespace collapsed first, so
+    requests that differ only in spacing or Unicode form share an entry.
+    """
+    text = " ".join(unicodedata.normalize('NFKC', text).split())
+    return hashlib.sha1(f"{model}|{voice_path}|{device}|{text}".encode('utf-8')).hexdigest()
+
+def _get_cached_result(key):
+    """Return the cached output path for a request hash, or None if it's unknown or was deleted."""
+    with result_cache_lock:
+        output_path = result_cache.get(key)
+        if output_path is None:
+            return None
+        if not os.path.exists(output_path):
+            del result_cache[key]
+            return None
+        result_cache.move_to_end(key)
+        return output_path
+
+def _put_cached_result(key, output_path):
+    """Remember a generation's output, evicting the least recently used entries."""
+    with result_cache_lock:
+        result_cache[key] = output_path
+        result_cache.move_to_end(key)
+        while len(result_cache) > RESULT_CACHE_SIZE:
+            result_cache.popitem(last=False)
+
+def _generate_collapsed(key, generate):
+    """
+    Call generate() for a request hash, or wait for the identical call already running.
+    
+    The first caller for a key runs generate() and publishes its result (or
+    exception) on a Future that later callers block on, so K concurrent
+    duplicates cost one model run. Only the first caller ever generates, so
+    waiting callers can't starve it of an executor worker.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    
+    if leader:
+        try:
+            future.set_result(generate())
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with _inflight_lock:
+                del _inflight[key]
+    return future.result()
+
 # Add an alias for the generate_speech endpoint for backward compatibility
 @app.route('/api/tts', methods=['POST'])
 def generate_speech_alias():
@@ -885,13 +550,10 @@ def perform_generation(task_id, text, voice_path, device, model):
     try:
         logger.info(f"Starting generation task {task_id} for text: '{text}'")
         
-        with task_lock:
-            if task_id not in tasks:
-                logger.warning(f"Task {task_id} not found in task list")
-                return
-            
-            tasks[task_id]["status"] = "running"
-            tasks[task_id]["progress"] = 10
+        task = update_task(task_id, status="running", progress=10)
+        if task is None:
+            logger.warning(f"Task {task_id} not found in task list")
+            return
         
         # Short text optimization
         is_short_text = len(text) < 10
@@ -900,18 +562,10 @@ def perform_generation(task_id, text, voice_path, device, model):
         if not voice_path:
             raise ValueError("Voice path is required")
         
-        # Get the script directory
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        # Handle different voice path formats
+        # Accept 'voices/input/x.wav', 'input/x.wav' or a bare 'x.wav' in voices/input
         if voice_path.startswith('voices/'):
-            # Remove 'voices/' prefix if present
             voice_path = voice_path[7:]
-        
-        if voice_path.startswith('input/'):
-            voice_path = os.path.join(script_dir, 'voices', voice_path)
-        else:
-            voice_path = os.path.join(script_dir, 'voices', 'input', voice_path)
+        voice_path = os.path.join(VOICES_DIR if voice_path.startswith('input/') else VOICES_INPUT_DIR, voice_path)
         
         # Verify the voice file exists
         if not os.path.exists(voice_path):
@@ -919,150 +573,287 @@ def perform_generation(task_id, text, voice_path, device, model):
         
         logger.info(f"Using voice file: {voice_path}")
         
-        with task_lock:
-            tasks[task_id]["progress"] = 20
+        update_task(task_id, progress=20)
         
         # Check if the selected model is available
-        if model == "csm" and not csm_available:
+        csm_adapter = get_csm() if model == "csm" else None
+        if model == "csm" and csm_adapter is None:
             raise ValueError("CSM model is not available")
         
+        # Identical requests reuse the earlier output
+        cache_key = _result_key(model, voice_path, device, text)
+        output_path = _get_cached_result(cache_key)
+        
+        # The simple model's outputs are named after the request hash, so one that
+        # has dropped out of the cache (or predates a restart) is still on disk
+        hashed_path = os.path.join(voice_cloner.output_dir, f"tts_{cache_key}.wav")
+        if output_path is None and model != "csm" and os.path.exists(hashed_path):
+            output_path = hashed_path
+            _put_cached_result(cache_key, output_path)
+        
         # Choose the appropriate model
-        if model == "csm":
+        from_cache = output_path is not None
+        if from_cache:
+            logger.info(f"Using cached output for task {task_id}: {output_path}")
+        elif model == "csm":
             logger.info(f"Generating speech with CSM model: '{text}'")
             
-            with task_lock:
-                tasks[task_id]["progress"] = 30
-                
-            output_path = csm_adapter.generate_speech(text, voice_path, device)
+            update_task(task_id, progress=30)
             
-            with task_lock:
-                tasks[task_id]["progress"] = 90
+            output_path = _generate_collapsed(
+                cache_key, lambda: csm_adapter.generate_speech(text, voice_path, device))
         else:
             logger.info(f"Generating speech with simple model: '{text}'")
             
-            with task_lock:
-                tasks[task_id]["progress"] = 30
-                
-            # Generate output path
-            output_filename = voice_cloner._generate_output_filename()
-            output_path = os.path.join(voice_cloner.output_dir, output_filename)
-            success = voice_cloner.generate_direct(text, voice_path, output_path, device=device)
+            update_task(task_id, progress=30)
+            
+            # Name the output after the request hash so repeats get a stable URL. It is
+            # written under a temporary name and renamed into place, so a client
+            # never reads a half-written file
+            output_path = hashed_path
+            def generate():
+                tmp_path = f"{output_path[:-len('.wav')]}.{secrets.token_hex(4)}.tmp.wav"
+                try:
+                    with voice_cloner_lock:
+                        success = voice_cloner.generate_direct(text, voice_path, tmp_path, device=device)
+                    if success:
+                        os.replace(tmp_path, output_path)
+                    return success
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.unlink(tmp_path)
             
-            with task_lock:
-                tasks[task_id]["progress"] = 90
-                
+            success = _generate_collapsed(cache_key, generate)
             if not success:
                 output_path = None
         
         if output_path and os.path.exists(output_path):
             # Get relative path for frontend
-            rel_path = os.path.relpath(output_path, os.path.join(script_dir, 'voices'))
-            rel_path = rel_path.replace('\\', '/')  # Handle Windows paths
+            rel_path = os.path.relpath(output_path, VOICES_DIR)
+            if not _IS_POSIX:
+                rel_path = rel_path.replace(os.sep, '/')
             
             logger.info(f"Generation complete for task {task_id}. Audio saved to: {output_path}, relative path: {rel_path}")
+            if not from_cache:
+                _put_cached_result(cache_key, output_path)
+                _note_new_wav(output_path)
             
-            with task_lock:
-                tasks[task_id]["status"] = "complete"
-                tasks[task_id]["progress"] = 100
-                tasks[task_id]["output"] = f"audio/{os.path.basename(output_path)}"
-                tasks[task_id]["generation_time"] = time.time() - tasks[task_id].get("start_time", time.time())
-                
-            logger.info(f"Task {task_id} marked as complete with output: {tasks[task_id]['output']}")
+            task = update_task(
+                task_id,
+                status="complete",
+                progress=100,
+                output=f"audio/{os.path.basename(output_path)}",
+                generation_time=time.perf_counter() - task.start_perf
+            )
+            
+            if task is not None:
+                logger.info(f"Task {task_id} marked as complete with output: {task.output}")
         else:
             logger.error(f"Failed to generate or save audio file for task {task_id}")
             
-            with task_lock:
-                tasks[task_id]["status"] = "error"
-                tasks[task_id]["progress"] = 100
-                tasks[task_id]["error"] = "Failed to generate speech output"
+            update_task(task_id, status="error", progress=100, error="Failed to generate speech output")
     
     except Exception as e:
         logger.exception(f"Error during speech generation for task {task_id}: {e}")
         
-        with task_lock:
-            if task_id in tasks:
-                tasks[task_id]["status"] = "error"
-                tasks[task_id]["progress"] = 100
-                tasks[task_id]["error"] = str(e)
+        update_task(task_id, status="error", progress=100, error=str(e))
+    
+    finally:
+        if device != "cpu":
+            _release_cuda_cache()
+
+def _release_cuda_cache():
+    """Count a GPU task and empty the CUDA caching allocator every EMPTY_CACHE_EVERY of them."""
+    global _gpu_task_count
+    with _gpu_task_count_lock:
+        _gpu_task_count += 1
+        if _gpu_task_count % EMPTY_CACHE_EVERY:
+            return
+    
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+        logger.debug("Emptied the CUDA cache")
+
+# Behind nginx, set TTS_X_ACCEL_PREFIX to an 'internal' location that aliases the
+# voices directory (e.g. /internal_audio/ -> voices/); audio responses then carry
+# only an X-Accel-Redirect header and nginx sends the file itself with sendfile
+X_ACCEL_PREFIX = os.environ.get("TTS_X_ACCEL_PREFIX", "").rstrip("/")
+
+def _send_audio(directory, subdir, filename):
+    """Send a .wav from directory, which is voices/<subdir>, or hand it off to nginx."""
+    if not X_ACCEL_PREFIX:
+        return send_from_directory(directory, filename, mimetype='audio/wav', conditional=True, max_age=86400)
+    
+    # Check here so nginx is never redirected to a missing or out-of-tree file
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    
+    response = app.response_class(mimetype='audio/wav')
+    response.headers['X-Accel-Redirect'] = quote(f"{X_ACCEL_PREFIX}/{subdir}/{filename}")
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response
 
 @app.route('/audio/<path:filename>')
 def serve_audio(filename):
-    """Serve generated audio files."""
-    output_dir = os.path.join(script_dir, 'voices', 'output')
-    logger.info(f"Serving audio file: {filename} from {output_dir}")
-    return send_from_directory(output_dir, filename)
+    """
+    Serve generated audio files.
+    
+    Conditional responses let Werkzeug answer <audio> seeks with 206 Range
+    responses and repeat plays with a 304. Every output name is written
+    once: hashed tts_<key>.wav files are reused rather than regenerated
+    and are renamed into place, and other clips get names with a random
+    suffix that are created exclusively. So browsers can cache them for a day.
+    """
+    logger.info(f"Serving audio file: {filename} from {VOICES_OUTPUT_DIR}")
+    return _send_audio(VOICES_OUTPUT_DIR, 'output', filename)
 
 @app.route('/voices/output/<path:filename>')
 def serve_output_audio_alt(filename):
     """Alternative route for serving output audio files."""
-    output_dir = os.path.join(script_dir, 'voices', 'output')
-    logger.info(f"Serving output audio file (alt): {filename} from {output_dir}")
-    return send_from_directory(output_dir, filename)
+    logger.info(f"Serving output audio file (alt): {filename} from {VOICES_OUTPUT_DIR}")
+    return _send_audio(VOICES_OUTPUT_DIR, 'output', filename)
 
 @app.route('/voices/input/<path:filename>')
 def serve_input_audio(filename):
     """Serve input voice sample files."""
-    input_dir = os.path.join(script_dir, 'voices', 'input')
-    logger.info(f"Serving input audio file: {filename} from {input_dir}")
-    return send_from_directory(input_dir, filename)
+    logger.info(f"Serving input audio file: {filename} from {VOICES_INPUT_DIR}")
+    return _send_audio(VOICES_INPUT_DIR, 'input', filename)
+
+# Diagnostics reports are reused for this long, so a dashboard polling them doesn't
+# turn every request into /proc reads, directory scans and CUDA driver calls
+DIAGNOSTICS_TTL_SECONDS = 1.0
+_diagnostics_cache = {}
+_diagnostics_cache_lock = threading.Lock()
+
+def _ttl_cached(name, build):
+    """Return build()'s result, reusing the last one if it is under DIAGNOSTICS_TTL_SECONDS old."""
+    now = time.monotonic()
+    with _diagnostics_cache_lock:
+        cached = _diagnostics_cache.get(name)
+        if cached is not None and now - cached[0] < DIAGNOSTICS_TTL_SECONDS:
+            return cached[1]
+    
+    report = build()
+    with _diagnostics_cache_lock:
+        _diagnostics_cache[name] = (now, report)
+    return report
+
+# .wav counts per directory; a directory is rescanned at most this often, and new
+# outputs are counted as they're written in between
+WAV_COUNT_TTL_SECONDS = 2.0
+_wav_counts = {}
+_wav_counts_lock = threading.Lock()
+
+def _count_wavs(directory):
+    """Count the .wav files in a directory, or 0 if it doesn't exist."""
+    key = os.path.realpath(directory)
+    now = time.monotonic()
+    with _wav_counts_lock:
+        cached = _wav_counts.get(key)
+        if cached is not None and now - cached[0] < WAV_COUNT_TTL_SECONDS:
+            return cached[1]
+    
+    # scandir yields entries lazily and carries the file type, so no list or stat per file
+    try:
+        with os.scandir(key) as it:
+            count = sum(1 for e in it if e.name.endswith('.wav') and e.is_file())
+    except FileNotFoundError:
+        count = 0
+    
+    with _wav_counts_lock:
+        _wav_counts[key] = (now, count)
+    return count
+
+def _note_new_wav(path):
+    """Count a newly written .wav in its directory's cached total without a rescan."""
+    key = os.path.realpath(os.path.dirname(path))
+    with _wav_counts_lock:
+        cached = _wav_counts.get(key)
+        if cached is not None:
+            _wav_counts[key] = (cached[0], cached[1] + 1)
+
+@functools.lru_cache(maxsize=1)
+def _system_info():
+    """Host facts that don't change while the server runs."""
+    if psutil is None:
+        raise RuntimeError("psutil is required for system diagnostics")
+    
+    return {
+        'platform': platform.platform(),
+        'python_version': platform.python_version(),
+        'cpu_count': psutil.cpu_count(logical=False),
+        'logical_cpu_count': psutil.cpu_count(logical=True),
+        'memory_total_gb': round(psutil.virtual_memory().total / (1024**3), 2)
+    }
+
+@functools.lru_cache(maxsize=1)
+def _cuda_device_info():
+    """Properties of the current CUDA device, which don't change while the server runs; None without CUDA."""
+    if torch is None or not torch.cuda.is_available():
+        return None
+    
+    device = torch.cuda.current_device()
+    return {
+        'device': device,
+        'device_count': torch.cuda.device_count(),
+        'name': torch.cuda.get_device_name(device),
+        'capability': torch.cuda.get_device_capability(device),
+        'total_memory': torch.cuda.get_device_properties(device).total_memory
+    }
+
+def _diagnostic_report():
+    """Build the /api/diagnostic report."""
+    # Basic system info
+    system_info = dict(_system_info())
+    system_info['memory_available_gb'] = round(psutil.virtual_memory().available / (1024**3), 2)
+    
+    # PyTorch and CUDA info
+    cuda = _cuda_device_info()
+    torch_info = {
+        'torch_version': torch.__version__ if torch is not None else None,
+        'cuda_available': cuda is not None,
+        'cuda_device_count': cuda['device_count'] if cuda is not None else 0,
+    }
+    
+    # Add CUDA device info if available
+    if cuda is not None:
+        free_memory = cuda['total_memory'] - torch.cuda.memory_allocated(cuda['device'])
+        free_memory_mb = free_memory / (1024 * 1024)
+        torch_info['cuda_device_name'] = cuda['name']
+        torch_info['cuda_device_capability'] = cuda['capability']
+        torch_info['cuda_free_memory_mb'] = round(free_memory_mb, 2)
+    
+    # Voice cloner info
+    voice_cloner_info = {
+        'input_dir': voice_cloner.input_voice_dir,
+        'output_dir': voice_cloner.output_dir,
+        'input_files': _count_wavs(voice_cloner.input_voice_dir),
+        'output_files': _count_wavs(voice_cloner.output_dir)
+    }
+    
+    # File paths check
+    path_checks = {
+        'input_dir_exists': os.path.exists(voice_cloner.input_voice_dir),
+        'output_dir_exists': os.path.exists(voice_cloner.output_dir),
+        'input_dir_writable': os.access(voice_cloner.input_voice_dir, os.W_OK),
+        'output_dir_writable': os.access(voice_cloner.output_dir, os.W_OK)
+    }
+    
+    return {
+        'system': system_info,
+        'torch': torch_info,
+        'voice_cloner': voice_cloner_info,
+        'path_checks': path_checks,
+        'status': 'healthy'
+    }
 
 @app.route('/api/diagnostic', methods=['GET'])
 def diagnostic():
     """Run a diagnostic check on the TTS system."""
     try:
-        import torch
-        import platform
-        import psutil
-        
-        # Basic system info
-        system_info = {
-            'platform': platform.platform(),
-            'python_version': platform.python_version(),
-            'cpu_count': psutil.cpu_count(logical=False),
-            'logical_cpu_count': psutil.cpu_count(logical=True),
-            'memory_total_gb': round(psutil.virtual_memory().total / (1024**3), 2),
-            'memory_available_gb': round(psutil.virtual_memory().available / (1024**3), 2)
-        }
-        
-        # PyTorch and CUDA info
-        torch_info = {
-            'torch_version': torch.__version__,
-            'cuda_available': torch.cuda.is_available(),
-            'cuda_device_count': torch.cuda.device_count() if torch.cuda.is_available() else 0,
-        }
-        
-        # Add CUDA device info if available
-        if torch.cuda.is_available():
-            device = torch.cuda.current_device()
-            free_memory = torch.cuda.get_device_properties(device).total_memory - torch.cuda.memory_allocated(device)
-            free_memory_mb = free_memory / (1024 * 1024)
-            torch_info['cuda_device_name'] = torch.cuda.get_device_name(device)
-            torch_info['cuda_device_capability'] = torch.cuda.get_device_capability(device)
-            torch_info['cuda_free_memory_mb'] = round(free_memory_mb, 2)
-        
-        # Voice cloner info
-        voice_cloner_info = {
-            'input_dir': voice_cloner.input_voice_dir,
-            'output_dir': voice_cloner.output_dir,
-            'input_files': len([f for f in os.listdir(voice_cloner.input_voice_dir) if f.endswith('.wav')]),
-            'output_files': len([f for f in os.listdir(voice_cloner.output_dir) if f.endswith('.wav')])
-        }
-        
-        # File paths check
-        path_checks = {
-            'input_dir_exists': os.path.exists(voice_cloner.input_voice_dir),
-            'output_dir_exists': os.path.exists(voice_cloner.output_dir),
-            'input_dir_writable': os.access(voice_cloner.input_voice_dir, os.W_OK),
-            'output_dir_writable': os.access(voice_cloner.output_dir, os.W_OK)
-        }
-        
-        return jsonify({
-            'system': system_info,
-            'torch': torch_info,
-            'voice_cloner': voice_cloner_info,
-            'path_checks': path_checks,
-            'status': 'healthy'
-        })
+        return jsonify(_ttl_cached('diagnostic', _diagnostic_report))
     
     except Exception as e:
         logger.exception("Error running diagnostic")
@@ -1071,81 +862,93 @@ def diagnostic():
 @app.route('/api/status/<task_id>')
 def get_task_status(task_id):
     """Get the status of a generation task."""
-    with task_lock:
-        if task_id not in tasks:
-            return jsonify({"error": "Task not found"}), 404
-        
-        return jsonify(tasks[task_id])
+    tasks, _ = _task_shard(task_id)
+    # Records are replaced rather than mutated, so a lock-free read sees a whole one
+    task = tasks.get(task_id)
+    if task is None:
+        return jsonify({"error": "Task not found"}), 404
+    
+    status = asdict(task)
+    del status['start_perf']
+    return jsonify(status)
+
+def _diagnostics_report():
+    """Build the /api/diagnostics report."""
+    # Check CUDA availability
+    cuda = _cuda_device_info()
+    cuda_details = {}
+    
+    if cuda is not None:
+        device = cuda["device"]
+        # One allocator query serves both the allocated and the free figure
+        total = cuda["total_memory"]
+        allocated = torch.cuda.memory_allocated(device)
+        mb = 1 / (1024 * 1024)
+        cuda_details = {
+            "device_count": cuda["device_count"],
+            "current_device": device,
+            "device_name": cuda["name"],
+            "total_memory_mb": total * mb,
+            "allocated_memory_mb": allocated * mb,
+            "free_memory_mb": (total - allocated) * mb
+        }
+    
+    # Get voice sample info
+    input_count = _count_wavs(VOICES_INPUT_DIR)
+    output_count = _count_wavs(VOICES_OUTPUT_DIR)
+    
+    # Get model info
+    csm_info = {
+        "available": get_csm() is not None,
+        "script_path": os.path.join(HERE, "utils", "csm_adapter.py"),
+        "movie_maker_path_exists": os.path.exists("/home/tdeshane/movie_maker")
+    }
+    
+    return {
+        "cuda": {
+            "available": cuda is not None,
+            "details": cuda_details
+        },
+        "voices": {
+            "input_count": input_count,
+            "output_count": output_count
+        },
+        "models": {
+            "simple": {
+                "available": True
+            },
+            "csm": csm_info
+        }
+    }
 
 @app.route('/api/diagnostics')
 def get_diagnostics():
     """Get system diagnostics information."""
     try:
-        # Check CUDA availability
-        import torch
-        
-        cuda_available = torch.cuda.is_available()
-        cuda_details = {}
-        
-        if cuda_available:
-            device = torch.cuda.current_device()
-            cuda_details = {
-                "device_count": torch.cuda.device_count(),
-                "current_device": device,
-                "device_name": torch.cuda.get_device_name(device),
-                "total_memory_mb": torch.cuda.get_device_properties(device).total_memory / (1024 * 1024),
-                "allocated_memory_mb": torch.cuda.memory_allocated(device) / (1024 * 1024),
-                "free_memory_mb": (torch.cuda.get_device_properties(device).total_memory - torch.cuda.memory_allocated(device)) / (1024 * 1024)
-            }
-        
-        # Get voice sample info
-        input_dir = os.path.join(script_dir, "voices", "input")
-        output_dir = os.path.join(script_dir, "voices", "output")
-        
-        input_count = 0
-        output_count = 0
-        
-        if os.path.exists(input_dir):
-            input_count = len([f for f in os.listdir(input_dir) if f.endswith('.wav')])
-        
-        if os.path.exists(output_dir):
-            output_count = len([f for f in os.listdir(output_dir) if f.endswith('.wav')])
-        
-        # Get model info
-        csm_info = {
-            "available": csm_available,
-            "script_path": os.path.join(script_dir, "utils", "csm_adapter.py"),
-            "movie_maker_path_exists": os.path.exists("/home/tdeshane/movie_maker")
-        }
-        
-        return jsonify({
-            "cuda": {
-                "available": cuda_available,
-                "details": cuda_details
-            },
-            "voices": {
-                "input_count": input_count,
-                "output_count": output_count
-            },
-            "models": {
-                "simple": {
-                    "available": True
-                },
-                "csm": csm_info
-            }
-        })
+        return jsonify(_ttl_cached('diagnostics', _diagnostics_report))
     except Exception as e:
         logger.exception(f"Error getting diagnostics: {e}")
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
-    # Ensure the output directory exists
-    os.makedirs(voice_cloner.output_dir, exist_ok=True)
-    
     # Log startup information
     logger.info(f"Starting TTS Web API server")
     logger.info(f"Input voice directory: {voice_cloner.input_voice_dir}")
     logger.info(f"Output voice directory: {voice_cloner.output_dir}")
     
-    # Start the server
-    app.run(host='0.0.0.0', port=9001, debug=False) 
\ No newline at end of file
+    start_warmup()
+    start_task_reaper()
+    
+    # Start the server. Generation runs on the executor, so request threads only
+    # ever block briefly; a thread pool keeps status polls and audio downloads
+    # concurrent with each other. Tasks live in this process, so the app must
+    # run as a single process rather than behind multiple workers (see
+    # gunicorn.conf.py). Waitress is used when installed; Werkzeug's development
+    # server is the fallback.
+    try:
+        from waitress import serve
+    except ImportError:
+        logger.warning("waitress is not installed, falling back to the Flask development server")
+        app.run(host='0.0.0.0', port=9001, debug=False, threaded=True)
+    else:
+        serve(app, host='0.0.0.0', port=9001, threads=8) 
\ No newline at end of file